@@ -1,3 +1,9 @@
+"""Urban air quality dashboard for UK cities, served with Panel.
+
+Cached renderers are called with readings already rounded to the precision they are shown at
+(particulates, temperature and humidity to one decimal, gases to whole ppb), so readings that
+look the same on screen share one cache entry.
+"""
 import panel as pn
 import pandas as pd
 import sqlite3
@@ -6,15 +12,83 @@ import plotly.graph_objects as go
 from plotly.subplots import make_subplots
 import numpy as np
 import os
+import re
+import json
+import string
+from functools import lru_cache, wraps
+from contextlib import closing
+from jinja2 import Environment
 from datetime import datetime, timedelta
 
+try:
+    from numba import njit
+except ImportError:  # numba is optional; fall back to the NumPy implementation
+    njit = None
+
+try:
+    import diskcache
+except ImportError:  # diskcache is optional; rendered HTML then stays in memory only
+    diskcache = None
+
 # Configure Panel with memory optimizations
 pn.extension('plotly', sizing_mode='stretch_width')
-# Cache disabled by removing @pn.cache decorators for memory efficiency
+# Loaders and rendered views use bounded @pn.cache entries that expire after CACHE_TTL seconds,
+# shared across sessions so repeated interactions skip the SQLite round trip
+CACHE_TTL = 300
 
 # Environment configuration for deployment
 PORT = int(os.environ.get('PORT', 5006))
 ALLOW_WEBSOCKET_ORIGIN = os.environ.get('PANEL_ALLOW_WEBSOCKET_ORIGIN', '*')
+# Static files (the pollutant detail stylesheet), served at /assets
+ASSETS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'assets')
+
+# Environment for the precompiled HTML templates
+_JINJA_ENV = Environment(autoescape=True)
+
+_BETWEEN_TAGS = re.compile(r'>\s+<')
+_SPACE_RUN = re.compile(r'[ \t]{2,}')
+
+def _mini(markup):
+    """Collapse whitespace between tags and runs of spaces in script-free markup"""
+    return _SPACE_RUN.sub(' ', _BETWEEN_TAGS.sub('><', markup))
+
+def _strip_indent(markup):
+    """Drop the source indentation from a markup/script constant; line breaks are kept, so inline
+    scripts and their // comments still parse"""
+    return re.sub(r'\n[ \t]+', '\n', markup)
+
+# --- DATABASE CONNECTION ---
+DB_PATH = "air_quality.sqlite"
+
+def _ensure_indexes():
+    """Create the (site, datetime) index used by the per-site queries if it is missing"""
+    if not os.path.exists(DB_PATH):
+        raise FileNotFoundError(f"Air quality database not found: {DB_PATH}")
+    try:
+        # mode=rw never creates the file, unlike a plain connect
+        with closing(sqlite3.connect(f"file:{DB_PATH}?mode=rw", uri=True)) as conn:
+            exists = conn.execute(
+                "SELECT 1 FROM sqlite_master WHERE type = 'index' AND name = 'idx_site_dt'"
+            ).fetchone()
+            if not exists:
+                conn.execute("CREATE INDEX IF NOT EXISTS idx_site_dt ON defra_uk_air_quality(site, datetime DESC)")
+                # Refresh planner statistics so the new index is picked up
+                conn.execute("ANALYZE")
+                conn.commit()
+    except sqlite3.Error as e:
+        print(f"Could not create database index: {e}")
+
+def _connect():
+    """Open a read-only SQLite connection tuned for repeated dashboard queries"""
+    _ensure_indexes()
+    conn = sqlite3.connect(f"file:{DB_PATH}?mode=ro", uri=True, check_same_thread=False)
+    conn.execute("PRAGMA mmap_size=268435456")  # Memory-map up to 256 MB of the database
+    conn.execute("PRAGMA cache_size=-65536")  # 64 MB page cache
+    conn.execute("PRAGMA temp_store=MEMORY")
+    return conn
+
+# One connection shared by every session, so the page cache stays warm between interactions
+_CONN = pn.state.as_cached('air_quality_db', _connect)
 
 # --- STATE MANAGEMENT ---
 # Track selected pollutant for detailed view - using simple variables
@@ -22,175 +96,315 @@ selected_pollutant = 'AQI'
 current_view = 'dashboard'
 
 # --- OPTIMIZED DATA LOADING FUNCTIONS ---
+# Columns the dashboard reads; anything else in the table stays in SQLite
+DATA_COLUMNS = ['site', 'latitude', 'longitude', 'datetime', 'pm25', 'pm10', 'no2', 'o3', 'co', 'so2', 'temperature', 'humidity']
+# Readings are displayed to one decimal place, so they are stored as float32 (half the memory of float64)
+FLOAT32_COLUMNS = ['latitude', 'longitude', 'pm25', 'pm10', 'no2', 'o3', 'co', 'so2', 'temperature', 'humidity']
+
+# Only request columns the table actually has (older extracts may lack co/so2)
+_table_columns = {row[1] for row in _CONN.execute("PRAGMA table_info(defra_uk_air_quality)")}
+COLS = ", ".join(c for c in DATA_COLUMNS if c in _table_columns)
+COL_DTYPES = {c: 'float32' for c in FLOAT32_COLUMNS if c in _table_columns}
+
+# Database column for each pollutant; also the whitelist for column names interpolated into SQL
+POLLUTANT_COLUMNS = {'PM2.5': 'pm25', 'PM10': 'pm10', 'NO2': 'no2', 'O3': 'o3', 'CO': 'co', 'SO2': 'so2'}
+
+def _downcast(df):
+    """Shrink loaded frames: float32 for any remaining float64 columns, category for site"""
+    for col in df.select_dtypes(include="float64").columns:
+        df[col] = pd.to_numeric(df[col], downcast="float")
+    if "site" in df.columns:
+        df["site"] = df["site"].astype("category")
+    return df
+
+def db_mtime():
+    """Latest modification time of the database, including a pending write-ahead log"""
+    wal = f"{DB_PATH}-wal"
+    mtime = os.path.getmtime(DB_PATH)
+    return max(mtime, os.path.getmtime(wal)) if os.path.exists(wal) else mtime
+
 def load_latest_data():
     """Load latest air quality data from SQLite database - optimized for memory"""
-    conn = sqlite3.connect("air_quality.sqlite")
-    # Only get the latest reading for each site using SQL to reduce memory usage
-    query = """
-    SELECT * FROM defra_uk_air_quality 
-    WHERE (site, datetime) IN (
-        SELECT site, MAX(datetime) 
-        FROM defra_uk_air_quality 
-        GROUP BY site
-    )
+    # Keyed on the database file's modification time, so the query and parse run once per data update
+    return _load_latest_data(db_mtime())
+
+@pn.cache(max_items=4, ttl=CACHE_TTL)
+def _load_latest_data(data_version):
+    """Query and parse the latest reading per site; data_version only serves as the cache key"""
+    # Only get the latest reading for each site using SQL to reduce memory usage.
+    # With a single MAX() aggregate, SQLite fills the bare columns from the row holding the maximum.
+    query = f"""
+    SELECT {COLS}, MAX(datetime) AS latest_datetime
+    FROM defra_uk_air_quality 
+    GROUP BY site
     """
-    df = pd.read_sql_query(query, conn)
-    conn.close()
-    df["datetime"] = pd.to_datetime(df["datetime"])
+    df = pd.read_sql_query(query, _CONN, dtype=COL_DTYPES).drop(columns="latest_datetime")
+    df["datetime"] = pd.to_datetime(df["datetime"], format="ISO8601", cache=True)
+    df = _downcast(df)
     return df
 
-def load_historical_data_sample(site=None, limit=1000):
-    """Load sampled historical data for trends - memory optimized"""
-    conn = sqlite3.connect("air_quality.sqlite")
-    if site:
-        # Load recent data for specific site
-        query = """
-        SELECT * FROM defra_uk_air_quality 
-        WHERE site = ? 
-        ORDER BY datetime DESC 
-        LIMIT ?
-        """
-        df = pd.read_sql_query(query, conn, params=(site, limit))
+@pn.cache(max_items=64, ttl=CACHE_TTL)
+def load_historical_data_sample(site, limit=1000, columns=None, data_version=None):
+    """Load the most recent readings for a site - memory optimized"""
+    # columns: optional tuple of column names to fetch instead of every DATA_COLUMNS entry
+    # data_version (e.g. db_mtime()) only extends the cache key, so new data misses the cache
+    if columns is None:
+        cols, dtypes = COLS, COL_DTYPES
     else:
-        # Load sample of recent data across all sites
-        query = """
-        SELECT * FROM defra_uk_air_quality 
-        ORDER BY datetime DESC 
-        LIMIT ?
-        """
-        df = pd.read_sql_query(query, conn, params=(limit,))
-    conn.close()
-    df["datetime"] = pd.to_datetime(df["datetime"])
+        unknown = set(columns) - _table_columns.intersection(DATA_COLUMNS)
+        if unknown:
+            raise ValueError(f"Unknown columns: {sorted(unknown)}")
+        cols = ", ".join(columns)
+        dtypes = {c: t for c, t in COL_DTYPES.items() if c in columns}
+    query = f"""
+    SELECT {cols} FROM defra_uk_air_quality 
+    WHERE site = ?
+    ORDER BY datetime DESC 
+    LIMIT ?
+    """
+    df = pd.read_sql_query(query, _CONN, params=(site, limit), dtype=dtypes)
+    if "datetime" not in df.columns:
+        return _downcast(df)
+    df["datetime"] = pd.to_datetime(df["datetime"], format="ISO8601", cache=True)
+    df = _downcast(df)
     return df.sort_values("datetime")
 
+@pn.cache(max_items=64, ttl=CACHE_TTL)
+def load_history_arrays(site, limit=1000, data_version=None):
+    """Load the newest PM2.5 readings for a site as time-sorted (datetimes, pm25) NumPy arrays"""
+    # data_version (e.g. db_mtime()) only extends the cache key, so new data misses the cache
+    rows = _CONN.execute(
+        "SELECT datetime, pm25 FROM defra_uk_air_quality WHERE site = ? ORDER BY datetime DESC LIMIT ?",
+        (site, limit)
+    ).fetchall()
+    # The index hands rows back newest first; charts want them oldest first
+    rows.reverse()
+    datetimes = pd.to_datetime([row[0] for row in rows], format="ISO8601", cache=True).to_numpy()
+    pm25 = np.array([row[1] for row in rows], dtype=np.float32)  # NULL readings become NaN
+    return datetimes, pm25
+
+# Aggregate queries built once per whitelisted column, so each call reuses the same SQL text
+# (and SQLite's prepared statement) with only the site bound as a parameter
+_DAILY_MEANS_SQL = {
+    col: f"""
+    SELECT date(datetime) AS date, AVG({col}) AS value
+    FROM defra_uk_air_quality
+    WHERE site = ?
+    GROUP BY date
+    ORDER BY date
+    """
+    for col in POLLUTANT_COLUMNS.values()
+}
+# Average per calendar month, then across years
+_MONTHLY_SQL = {
+    col: f"""
+    SELECT CAST(m AS INTEGER) AS month, AVG(avg_value)
+    FROM (
+        SELECT strftime('%Y', datetime) AS y, strftime('%m', datetime) AS m, AVG({col}) AS avg_value
+        FROM defra_uk_air_quality
+        WHERE site = ?
+        GROUP BY y, m
+    )
+    GROUP BY m
+    """
+    for col in POLLUTANT_COLUMNS.values()
+}
+
+@pn.cache(max_items=64, ttl=CACHE_TTL)
+def load_daily_means(site, pollutant_col, data_version=None):
+    """Load daily averages of one pollutant for a site, aggregated inside SQLite"""
+    # data_version only extends the cache key, as in load_history_arrays
+    if pollutant_col not in _DAILY_MEANS_SQL:
+        raise ValueError(f"Unknown pollutant column: {pollutant_col}")
+    df = pd.read_sql_query(_DAILY_MEANS_SQL[pollutant_col], _CONN, params=(site,))
+    df["date"] = pd.to_datetime(df["date"], format="ISO8601", cache=True)
+    return _downcast(df)
+
 def get_cities_list():
     """Get list of cities without loading full dataset"""
-    conn = sqlite3.connect("air_quality.sqlite")
-    cities_df = pd.read_sql_query("SELECT DISTINCT site FROM defra_uk_air_quality ORDER BY site", conn)
-    conn.close()
-    return sorted(cities_df["site"].tolist())
+    # The latest-per-site frame already holds every site, and its category dtype lists them directly
+    return sorted(load_latest_data()["site"].cat.categories)
 
-# Load minimal data at startup
-latest_data = load_latest_data()
+# Load minimal data at startup; latest_version is the database version latest_data was read at
+latest_version = db_mtime()
+latest_data = _load_latest_data(latest_version)
 cities = get_cities_list()
+# Hash lookups by site, so callbacks don't scan latest_data for the selected city
+latest_sites = frozenset(latest_data['site'])
+latest_by_site = latest_data.set_index('site', drop=False)
 
 # --- AQI CALCULATION FUNCTIONS ---
+# PM2.5 breakpoints (upper bound of each band), and the AQI start/span each band maps to
+PM25_BP_HI = np.array([12, 35.4, 55.4, 150.4, 250.4, 350.4, 500.4])
+PM25_BP_LO = np.array([0, 12, 35.4, 55.4, 150.4, 250.4, 350.4])
+AQI_LO = np.array([0, 50, 100, 150, 200, 300, 400])
+AQI_SPAN = np.array([50, 50, 50, 100, 100, 100, 100])
+
+def calc_aqi_vec(pm25):
+    """Calculate AQI for a whole array of PM2.5 readings in one vectorized pass"""
+    # Breakpoint arithmetic stays in float64: float32 breakpoints would move edges such as 35.4
+    # and put boundary readings in a different band than the float64 ladder
+    pm25 = np.asarray(pm25, dtype=np.float64)
+    # Index of the band each reading falls in (readings above 500.4 or NaN land past the end)
+    idx = np.searchsorted(PM25_BP_HI, pm25)
+    band = np.minimum(idx, len(PM25_BP_HI) - 1)
+    aqi = AQI_LO[band] + (pm25 - PM25_BP_LO[band]) / (PM25_BP_HI[band] - PM25_BP_LO[band]) * AQI_SPAN[band]
+    aqi = np.where(idx >= len(PM25_BP_HI), 500, aqi)
+    return np.trunc(aqi).astype(np.int64)
+
+@lru_cache(maxsize=4096)
 def calc_aqi(pm25):
     """Calculate AQI based on PM2.5 using US EPA standards"""
-    if pm25 <= 12:
-        return int(pm25 / 12 * 50)
-    elif pm25 <= 35.4:
-        return int(50 + (pm25-12)/(35.4-12)*50)
-    elif pm25 <= 55.4:
-        return int(100 + (pm25-35.4)/(55.4-35.4)*50)
-    elif pm25 <= 150.4:
-        return int(150 + (pm25-55.4)/(150.4-55.4)*100)
-    elif pm25 <= 250.4:
-        return int(200 + (pm25-150.4)/(250.4-150.4)*100)
-    elif pm25 <= 350.4:
-        return int(300 + (pm25-250.4)/(350.4-250.4)*100)
-    elif pm25 <= 500.4:
-        return int(400 + (pm25-350.4)/(500.4-350.4)*100)
-    else:
-        return 500
+    return int(calc_aqi_vec(np.array([pm25]))[0])
+
+def _calc_aqi_loop(pm25):
+    """Single-pass elif ladder equivalent to calc_aqi_vec, compiled with numba when it is installed"""
+    out = np.empty(pm25.shape[0], dtype=np.int64)
+    for i in range(pm25.shape[0]):
+        v = pm25[i]
+        if v <= 12:
+            out[i] = int(v / 12 * 50)
+        elif v <= 35.4:
+            out[i] = int(50 + (v-12)/(35.4-12)*50)
+        elif v <= 55.4:
+            out[i] = int(100 + (v-35.4)/(55.4-35.4)*50)
+        elif v <= 150.4:
+            out[i] = int(150 + (v-55.4)/(150.4-55.4)*100)
+        elif v <= 250.4:
+            out[i] = int(200 + (v-150.4)/(250.4-150.4)*100)
+        elif v <= 350.4:
+            out[i] = int(300 + (v-250.4)/(350.4-250.4)*100)
+        elif v <= 500.4:
+            out[i] = int(400 + (v-350.4)/(500.4-350.4)*100)
+        else:
+            out[i] = 500
+    return out
+
+if njit is not None:
+    # No fastmath: NaN readings must keep falling through to 500 like calc_aqi_vec
+    _calc_aqi_numba = njit(cache=True)(_calc_aqi_loop)
+
+    def calc_aqi_batch(pm25):
+        """Calculate AQI for a batch of PM2.5 readings with the compiled kernel"""
+        return _calc_aqi_numba(np.ascontiguousarray(pm25, dtype=np.float64))
+
+    # Compile once at startup rather than on the first chart render
+    calc_aqi_batch(np.zeros(1))
+else:
+    calc_aqi_batch = calc_aqi_vec
+
+def _aggregate_aqi_vec(timestamps, aqi, bucket_ns):
+    """Mean AQI per time bucket of time-sorted readings, with the index of each bucket's first reading"""
+    buckets = timestamps // bucket_ns
+    starts = np.flatnonzero(np.r_[True, buckets[1:] != buckets[:-1]])
+    counts = np.diff(np.r_[starts, len(aqi)])
+    return starts, np.add.reduceat(aqi, starts) // counts
+
+def _aggregate_aqi_loop(timestamps, aqi, bucket_ns):
+    """Single-pass run-length bucketing equivalent to _aggregate_aqi_vec, compiled with numba when it is installed"""
+    n = timestamps.shape[0]
+    starts = np.empty(n, dtype=np.int64)
+    means = np.empty(n, dtype=np.int64)
+    k = 0
+    i = 0
+    while i < n:
+        bucket = timestamps[i] // bucket_ns
+        total = 0
+        j = i
+        while j < n and timestamps[j] // bucket_ns == bucket:
+            total += aqi[j]
+            j += 1
+        starts[k] = i
+        means[k] = total // (j - i)
+        k += 1
+        i = j
+    return starts[:k], means[:k]
+
+if njit is not None:
+    # Integer floor means only, so fastmath would gain nothing and could drift from _aggregate_aqi_vec
+    _aggregate_aqi_kernel = njit(cache=True)(_aggregate_aqi_loop)
+    # Compile once at startup rather than on the first AQI graph render
+    _aggregate_aqi_kernel(np.zeros(1, dtype=np.int64), np.zeros(1, dtype=np.int64), 1)
+else:
+    _aggregate_aqi_kernel = _aggregate_aqi_vec
+
+def _aggregate_aqi(timestamps, aqi, bucket_minutes):
+    """Average AQI readings into bucket_minutes-wide time buckets, labelled by their first reading's time"""
+    if len(timestamps) == 0:
+        return timestamps, aqi
+    starts, means = _aggregate_aqi_kernel(
+        np.ascontiguousarray(timestamps.astype('datetime64[ns]').view(np.int64)),
+        np.ascontiguousarray(aqi, dtype=np.int64),
+        bucket_minutes * 60 * 10**9,
+    )
+    return timestamps[starts], means
+
+# Upper bound of each AQI status band (values above 300 are Hazardous), with parallel label arrays
+AQI_STATUS_BP = np.array([50, 100, 150, 200, 300])
+AQI_STATUS = np.array(["Good", "Moderate", "Unhealthy for Sensitive Groups", "Unhealthy", "Very Unhealthy", "Hazardous"], dtype=object)
+AQI_EMOJIS = np.array(["😊", "😐", "😷", "😷", "🤢", "☠️"], dtype=object)
+AQI_COLORS = np.array(["#00e400", "#ff8c00", "#ff7e00", "#ff0000", "#8f3f97", "#7e0023"], dtype=object)
+AQI_BG_COLORS = np.array(["#e8f5e8", "#fff3e0", "#fff3e0", "#ffebee", "#f3e5f5", "#fce4ec"], dtype=object)
+
+def get_aqi_status_vec(aqi):
+    """Get AQI status, emoji, color and background arrays for a whole array of AQI values"""
+    idx = np.searchsorted(AQI_STATUS_BP, np.asarray(aqi))
+    return AQI_STATUS[idx], AQI_EMOJIS[idx], AQI_COLORS[idx], AQI_BG_COLORS[idx]
 
 def get_aqi_status(aqi):
     """Get AQI status, emoji, and color"""
-    if aqi <= 50:
-        return ("Good", "😊", "#00e400", "#e8f5e8")
-    elif aqi <= 100:
-        return ("Moderate", "😐", "#ff8c00", "#fff3e0")
-    elif aqi <= 150:
-        return ("Unhealthy for Sensitive Groups", "😷", "#ff7e00", "#fff3e0")
-    elif aqi <= 200:
-        return ("Unhealthy", "😷", "#ff0000", "#ffebee")
-    elif aqi <= 300:
-        return ("Very Unhealthy", "🤢", "#8f3f97", "#f3e5f5")
-    else:
-        return ("Hazardous", "☠️", "#7e0023", "#fce4ec")
+    i = int(np.searchsorted(AQI_STATUS_BP, aqi))
+    return (AQI_STATUS[i], AQI_EMOJIS[i], AQI_COLORS[i], AQI_BG_COLORS[i])
+
+# Upper bound of each status band per pollutant; readings above the last bound are Hazardous
+POLLUTANT_THRESHOLDS = {
+    'PM2.5': np.array([12, 35.4, 55.4, 150.4, 250.4]),
+    'PM10': np.array([54, 154, 254, 354, 424]),
+    'NO2': np.array([53, 100, 360, 649, 1249]),
+    'O3': np.array([54, 70, 85, 105, 200]),
+    'CO': np.array([4.4, 9.4, 12.4, 15.4, 30.4]),
+    'SO2': np.array([35, 75, 185, 304, 604]),
+}
+# Status label, color and background color for each band (shared by all pollutants)
+POLLUTANT_STATUS = np.array(['Good', 'Moderate', 'Poor', 'Unhealthy', 'Severe', 'Hazardous'], dtype=object)
+POLLUTANT_COLORS = np.array(['#00e400', '#ff8c00', '#ff7e00', '#ff0000', '#8f3f97', '#7e0023'], dtype=object)  # Moderate uses orange instead of yellow
+POLLUTANT_BG_COLORS = np.array(['#e8f5e8', '#fff3e0', '#fff0e6', '#ffe6e6', '#f3e5f5', '#fce4ec'], dtype=object)
+
+def status_vec(pollutant, values):
+    """Get status, color, and background color arrays for an array of pollutant values"""
+    idx = np.searchsorted(POLLUTANT_THRESHOLDS[pollutant], values)
+    return POLLUTANT_STATUS[idx], POLLUTANT_COLORS[idx], POLLUTANT_BG_COLORS[idx]
+
+# Integer code per pollutant and the matching (num_pollutants, num_bounds) breakpoint table
+POLLUTANT_CODES = {pollutant: i for i, pollutant in enumerate(POLLUTANT_THRESHOLDS)}
+POLLUTANT_BPS = np.stack(list(POLLUTANT_THRESHOLDS.values()))
+
+def status_many(pol_codes, values):
+    """Get status, color, and background color arrays for mixed pollutants in one pass"""
+    values = np.asarray(values, dtype=np.float64)
+    # Number of bounds below each value is its band, matching searchsorted in status_vec
+    idx = (POLLUTANT_BPS[np.asarray(pol_codes)] < values[:, None]).sum(axis=-1)
+    # Missing readings compare False against every bound; keep them Hazardous like status_vec
+    idx = np.where(np.isnan(values), len(POLLUTANT_STATUS) - 1, idx)
+    return POLLUTANT_STATUS[idx], POLLUTANT_COLORS[idx], POLLUTANT_BG_COLORS[idx]
+
+# Pollutants whose status is graded on the pollutant cards, in card order
+CARD_POLLUTANT_CODES = np.array([POLLUTANT_CODES[p] for p in ('PM2.5', 'PM10', 'NO2', 'O3')])
+
+@lru_cache(maxsize=256)
+def _classify_pollutant(pollutant, value_bucket):
+    """Status, color, and background color for a reading quantized to tenths"""
+    status, color, bg_color = status_vec(pollutant, np.array([value_bucket / 10]))
+    return status[0], color[0], bg_color[0]
 
 def get_pollutant_status(pollutant, value):
     """Get pollutant status, color, and background color based on value"""
-    if pollutant == 'PM2.5':
-        if value <= 12:
-            return 'Good', '#00e400', '#e8f5e8'
-        elif value <= 35.4:
-            return 'Moderate', '#ff8c00', '#fff3e0'  # Changed from yellow to orange
-        elif value <= 55.4:
-            return 'Poor', '#ff7e00', '#fff0e6'
-        elif value <= 150.4:
-            return 'Unhealthy', '#ff0000', '#ffe6e6'
-        elif value <= 250.4:
-            return 'Severe', '#8f3f97', '#f3e5f5'
-        else:
-            return 'Hazardous', '#7e0023', '#fce4ec'
-    elif pollutant == 'PM10':
-        if value <= 54:
-            return 'Good', '#00e400', '#e8f5e8'
-        elif value <= 154:
-            return 'Moderate', '#ff8c00', '#fff3e0'  # Changed from yellow to orange
-        elif value <= 254:
-            return 'Poor', '#ff7e00', '#fff0e6'
-        elif value <= 354:
-            return 'Unhealthy', '#ff0000', '#ffe6e6'
-        elif value <= 424:
-            return 'Severe', '#8f3f97', '#f3e5f5'
-        else:
-            return 'Hazardous', '#7e0023', '#fce4ec'
-    elif pollutant == 'NO2':
-        if value <= 53:
-            return 'Good', '#00e400', '#e8f5e8'
-        elif value <= 100:
-            return 'Moderate', '#ff8c00', '#fff3e0'  # Changed from yellow to orange
-        elif value <= 360:
-            return 'Poor', '#ff7e00', '#fff0e6'
-        elif value <= 649:
-            return 'Unhealthy', '#ff0000', '#ffe6e6'
-        elif value <= 1249:
-            return 'Severe', '#8f3f97', '#f3e5f5'
-        else:
-            return 'Hazardous', '#7e0023', '#fce4ec'
-    elif pollutant == 'O3':
-        if value <= 54:
-            return 'Good', '#00e400', '#e8f5e8'
-        elif value <= 70:
-            return 'Moderate', '#ff8c00', '#fff3e0'  # Changed from yellow to orange
-        elif value <= 85:
-            return 'Poor', '#ff7e00', '#fff0e6'
-        elif value <= 105:
-            return 'Unhealthy', '#ff0000', '#ffe6e6'
-        elif value <= 200:
-            return 'Severe', '#8f3f97', '#f3e5f5'
-        else:
-            return 'Hazardous', '#7e0023', '#fce4ec'
-    elif pollutant == 'CO':
-        if value <= 4.4:
-            return 'Good', '#00e400', '#e8f5e8'
-        elif value <= 9.4:
-            return 'Moderate', '#ff8c00', '#fff3e0'  # Changed from yellow to orange
-        elif value <= 12.4:
-            return 'Poor', '#ff7e00', '#fff0e6'
-        elif value <= 15.4:
-            return 'Unhealthy', '#ff0000', '#ffe6e6'
-        elif value <= 30.4:
-            return 'Severe', '#8f3f97', '#f3e5f5'
-        else:
-            return 'Hazardous', '#7e0023', '#fce4ec'
-    elif pollutant == 'SO2':
-        if value <= 35:
-            return 'Good', '#00e400', '#e8f5e8'
-        elif value <= 75:
-            return 'Moderate', '#ff8c00', '#fff3e0'  # Changed from yellow to orange
-        elif value <= 185:
-            return 'Poor', '#ff7e00', '#fff0e6'
-        elif value <= 304:
-            return 'Unhealthy', '#ff0000', '#ffe6e6'
-        elif value <= 604:
-            return 'Severe', '#8f3f97', '#f3e5f5'
-        else:
-            return 'Hazardous', '#7e0023', '#fce4ec'
-    else:
+    if pollutant not in POLLUTANT_THRESHOLDS:
         return ("Unknown", "#666666", "#f5f5f5")
+    if np.isnan(value):
+        return POLLUTANT_STATUS[-1], POLLUTANT_COLORS[-1], POLLUTANT_BG_COLORS[-1]
+    # Readings are shown to one decimal place, so classify the same tenths bucket
+    return _classify_pollutant(pollutant, int(round(float(value) * 10)))
 
 def get_pollutant_info(pollutant):
     """Get pollutant information and description"""
@@ -289,21 +503,11 @@ time_range = pn.widgets.Select(
 )
 
 # --- MAP CREATION ---
-def create_map(city=None):
-    """Create interactive map with air quality data"""
-    if city and city in latest_data['site'].values:
-        # Filter data for selected city
-        city_data = latest_data[latest_data['site'] == city].iloc[0]
-        center_lat = city_data['latitude']
-        center_lon = city_data['longitude']
-        zoom = 11  # Closer zoom for selected city
-    else:
-        # Default UK view
-        center_lat, center_lon, zoom = 54.5, -3, 5.5
-    
-    # Create map with all cities
+@pn.cache(max_items=2, ttl=CACHE_TTL)
+def create_base_map(df):
+    """Create the UK-wide map of all sites; city views only add a highlight on top"""
     fig = px.scatter_map(
-        latest_data,
+        df,
         lat='latitude',
         lon='longitude',
         hover_name='site',
@@ -311,13 +515,36 @@ def create_map(city=None):
         color='pm25',
         color_continuous_scale='RdYlGn_r',
         size='pm25',
-        zoom=zoom,
-        center={'lat': center_lat, 'lon': center_lon}
+        zoom=5.5,
+        center={'lat': 54.5, 'lon': -3}  # Default UK view
+    )
+    
+    fig.update_layout(
+        map_style='carto-positron',
+        height=450,
+        margin={'l': 0, 'r': 0, 't': 30, 'b': 0},
+        showlegend=False,
+        coloraxis_showscale=False
     )
     
+    return fig
+
+def create_map(city=None):
+    """Create interactive map with air quality data"""
+    # Keyed on the version latest_data was loaded at, so a refresh never serves a map of older readings
+    return _create_map(city, latest_version)
+
+# No TTL: the data version already invalidates entries. Room for every site's map at two versions,
+# so the current set is never evicted by its own warm-up or by the changeover to new data
+@pn.cache(max_items=2 * len(cities) + 1)
+def _create_map(city, data_version):
+    """Build the map figure dict for a city from latest_data; data_version only serves as the cache key"""
+    # Copy the shared base map so the highlight never leaks into it
+    fig = go.Figure(create_base_map(latest_data))
+    
     # Highlight selected city with larger, prominent marker
-    if city and city in latest_data['site'].values:
-        city_data = latest_data[latest_data['site'] == city].iloc[0]
+    if city in latest_sites:
+        city_data = latest_by_site.loc[city]
         fig.add_trace(go.Scattermap(
             lat=[city_data['latitude']],
             lon=[city_data['longitude']],
@@ -331,51 +558,35 @@ def create_map(city=None):
             showlegend=False,
             hovertemplate=f'<b>{city}</b><br>Selected City<br>PM2.5: {city_data["pm25"]:.1f} µg/m³<extra></extra>'
         ))
+        # Closer zoom for selected city
+        fig.update_layout(map_center={'lat': city_data['latitude'], 'lon': city_data['longitude']}, map_zoom=11)
     
-    fig.update_layout(
-        map_style='carto-positron',
-        height=450,
-        margin={'l': 0, 'r': 0, 't': 30, 'b': 0},
-        showlegend=False,
-        coloraxis_showscale=False
-    )
-    
-    return fig
+    # Return a plain dict so each Plotly pane builds its own figure and user zoom/pan
+    # never mutates the cached copy shared with other sessions
+    return fig.to_dict()
 
 # --- DETAILED POLLUTANT VIEW ---
 def generate_monthly_graph_from_real_data(city, pollutant):
     """Generate monthly aggregated graph from real database data"""
     try:
-        # Load historical data (sampled for memory efficiency)
-        df = load_historical_data_sample(limit=2000)
-        city_data = df[df['site'] == city].copy()
-        
-        if len(city_data) == 0:
-            return None, None, None
-        
-        # Convert datetime and group by month
-        city_data['datetime'] = pd.to_datetime(city_data['datetime'])
-        city_data['month'] = city_data['datetime'].dt.month
-        city_data['year'] = city_data['datetime'].dt.year
+        pollutant_col = POLLUTANT_COLUMNS.get(pollutant)
+        if pollutant_col is None:
+            raise ValueError(f"Unknown pollutant: {pollutant}")
         
-        # Get pollutant column name
-        pollutant_col = pollutant.lower()
+        # Monthly averages aggregated inside SQLite; a dozen rows, so skip the DataFrame
+        monthly_avg = _CONN.execute(_MONTHLY_SQL[pollutant_col], (city,)).fetchall()
         
-        # Group by month and calculate monthly averages
-        monthly_data = city_data.groupby(['year', 'month'])[pollutant_col].mean().reset_index()
-        
-        # Create monthly averages across all years
-        monthly_avg = monthly_data.groupby('month')[pollutant_col].mean().reset_index()
+        if not monthly_avg or city not in latest_sites:
+            return None, None, None
         
         # Get current value for scaling
-        latest_data = city_data.sort_values('datetime').iloc[-1]
-        current_value = latest_data[pollutant_col]
+        current_value = float(latest_by_site.at[city, pollutant_col])
         
         # Calculate monthly factors relative to current value
         monthly_factors = {}
-        for _, row in monthly_avg.iterrows():
-            month = row['month']
-            avg_value = row[pollutant_col]
+        for month, avg_value in monthly_avg:
+            if avg_value is None:
+                avg_value = float('nan')
             factor = avg_value / current_value if current_value > 0 else 1.0
             monthly_factors[month] = factor
         
@@ -408,144 +619,76 @@ def generate_monthly_graph_from_real_data(city, pollutant):
         print(f"Error generating monthly graph: {e}")
         return None, None, None
 
-def create_detailed_pollutant_view(city, pollutant):
-    """Create detailed pollutant view with real historical data from database"""
-    # Load historical data for the specific city and pollutant (sampled for memory efficiency)
-    df = load_historical_data_sample(site=city, limit=1500)
-    city_data = df[df['site'] == city].copy()
-    
-    # Get latest data for current values
-    latest_data = city_data.sort_values('datetime').iloc[-1]
-    
-    # Get pollutant info
-    info = get_pollutant_info(pollutant)
-    
-    # Get current pollutant value and status
-    pollutant_value = latest_data[pollutant.lower()]
-    status, color, bg_color = get_pollutant_status(pollutant, pollutant_value)
-    
-    # Prepare data for the view
-    data = {
-        'value': pollutant_value,
-        'unit': info['unit'],
-        'status': status,
-        'color': color,
-        'icon': info['icon']
-    }
-    
-    # Get historical data for the graph (all-time data)
-    historical_data = city_data.copy()
-    
-    # Get realistic historical data for visualization
-    historical_data['date'] = historical_data['datetime'].dt.date
-    daily_data = historical_data.groupby('date')[pollutant.lower()].mean().reset_index()
-    
-    # Use systematic sampling to show realistic trends
-    # Take every nth data point to get a good representation
-    if len(daily_data) > 200:
-        step = len(daily_data) // 200
-        sampled_data = daily_data.iloc[::step].copy()
-    elif len(daily_data) > 100:
-        step = len(daily_data) // 100
-        sampled_data = daily_data.iloc[::step].copy()
-    else:
-        sampled_data = daily_data.copy()
-    
-    sampled_data = sampled_data.sort_values('date')  # Sort by date for proper timeline
-    sampled_data['date'] = pd.to_datetime(sampled_data['date'])
-    
-    # Prepare graph data
-    graph_data = []
-    for _, row in sampled_data.iterrows():
-        graph_data.append({
-            'date': row['date'],
-            'value': row[pollutant.lower()]
-        })
-    
-    # Calculate stats for the graph
-    if graph_data:
-        values = [d['value'] for d in graph_data]
-        max_value = max(values)
-        min_value = min(values)
-        current_value = pollutant_value
-    else:
-        max_value = pollutant_value * 1.2
-        min_value = pollutant_value * 0.8
-        current_value = pollutant_value
-    
-    # Generate graph HTML with real data
-    graph_html = generate_real_historical_graph(graph_data, pollutant, data)
-    
-    # Create the detailed view HTML
-    html_content = f"""
+# Detailed pollutant page, parsed once at import; CSS braces need no escaping with string.Template
+DETAIL_VIEW_TEMPLATE = string.Template("""
     <!DOCTYPE html>
     <html>
         <head>
             <meta charset="UTF-8">
             <meta name="viewport" content="width=device-width, initial-scale=1.0">
-            <title>{pollutant} Details for {city}</title>
+            <title>$pollutant Details for $city</title>
             <style>
-                * {{
+                * {
                     margin: 0;
                     padding: 0;
                     box-sizing: border-box;
-                }}
-                body {{
+                }
+                body {
                     font-family: 'Segoe UI', Tahoma, Geneva, Verdana, sans-serif;
                     background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
                     min-height: 100vh;
                     padding: 20px;
-                }}
-                .container {{ 
+                }
+                .container { 
                     max-width: 1200px;
                     margin: 0 auto; 
                     background: white; 
                     border-radius: 20px;
                     overflow: hidden;
                     box-shadow: 0 20px 40px rgba(0,0,0,0.1);
-                }}
-                .header {{
-                    background: linear-gradient(135deg, {color} 0%, {color}dd 100%);
+                }
+                .header {
+                    background: linear-gradient(135deg, $color 0%, ${color}dd 100%);
                     color: white;
                     padding: 30px;
                     text-align: center;
-                }}
-                .header h1 {{
+                }
+                .header h1 {
                     font-size: 2.5rem;
                     margin-bottom: 10px;
                     font-weight: 600;
-                }}
-                .header p {{
+                }
+                .header p {
                     font-size: 1.2rem;
                     opacity: 0.9;
-                }}
-                .main-content {{
+                }
+                .main-content {
                     padding: 40px;
-                    background: linear-gradient(135deg, {color}15 0%, #ffffff 100%); 
-                    border: 2px solid {color};
+                    background: linear-gradient(135deg, ${color}15 0%, #ffffff 100%); 
+                    border: 2px solid $color;
                     border-radius: 15px;
                     padding: 30px 25px; 
                     margin-bottom: 30px; 
                     text-align: center;
                     position: relative;
                     overflow: hidden;
-                }}
-                .current-level-section {{
+                }
+                .current-level-section {
                     margin-bottom: 40px;
-                }}
-                .current-level-title {{
+                }
+                .current-level-title {
                     font-size: 1.8rem;
                     color: #333;
                     margin-bottom: 10px;
                     font-weight: 600;
-                }}
-                .current-level-subtitle {{
+                }
+                .current-level-subtitle {
                     font-size: 1.2rem;
                     color: #666;
                     margin-bottom: 30px;
-                }}
-                .main-display {{
-                    background: linear-gradient(135deg, {color} 0%, {color}dd 100%);
+                }
+                .main-display {
+                    background: linear-gradient(135deg, $color 0%, ${color}dd 100%);
                     color: white;
                     border-radius: 20px;
                     padding: 30px;
@@ -554,79 +697,79 @@ def create_detailed_pollutant_view(city, pollutant):
                     flex-direction: column;
                     align-items: center;
                     gap: 15px;
-                    box-shadow: 0 10px 30px {color}40;
-                }}
-                .pollutant-icon {{
+                    box-shadow: 0 10px 30px ${color}40;
+                }
+                .pollutant-icon {
                     font-size: 3rem;
                     margin-bottom: 10px;
-                }}
-                .pollutant-value {{
+                }
+                .pollutant-value {
                     font-size: 3.5rem;
                     font-weight: 700;
                     display: flex;
                     align-items: baseline;
                     gap: 10px;
-                }}
-                .pollutant-unit {{
+                }
+                .pollutant-unit {
                     font-size: 1.5rem;
                     opacity: 0.8;
-                }}
-                .status-badge {{
-                    background: {color}; 
+                }
+                .status-badge {
+                    background: $color; 
                     color: white;
                     padding: 8px 20px; 
                     border-radius: 25px; 
                     font-weight: 600;
                     font-size: 1.1rem;
-                }}
-                .last-updated {{
+                }
+                .last-updated {
                     font-size: 0.9rem;
                     opacity: 0.8;
-                }}
-                .aqi-scale {{
+                }
+                .aqi-scale {
                     background: white;
                     border-radius: 10px;
                     padding: 20px;
                     margin: 20px 0;
                     box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-                }}
-                .scale-bar {{
+                }
+                .scale-bar {
                     display: flex;
                     height: 6px;
                     border-radius: 3px;
                     overflow: hidden;
                     margin-bottom: 8px;
-                }}
-                .scale-segment {{
+                }
+                .scale-segment {
                     flex: 1;
                     height: 100%;
-                }}
-                .scale-labels {{
+                }
+                .scale-labels {
                     display: flex;
                     justify-content: space-between;
                     font-size: 0.75rem;
                     color: #666;
                     font-weight: 500;
-                }}
-                .good {{ background: #00e400; }}
-                .moderate {{ background: #ff8c00; }}
-                .poor {{ background: #ff7e00; }}
-                .unhealthy {{ background: #ff0000; }}
-                .severe {{ background: #8f3f97; }}
-                .hazardous {{ background: #7e0023; }}
-                .graph-section {{
+                }
+                .good { background: #00e400; }
+                .moderate { background: #ff8c00; }
+                .poor { background: #ff7e00; }
+                .unhealthy { background: #ff0000; }
+                .severe { background: #8f3f97; }
+                .hazardous { background: #7e0023; }
+                .graph-section {
                     margin-top: 40px;
-                }}
-                .graph-title-section {{
+                }
+                .graph-title-section {
                     text-align: center;
                     margin-bottom: 20px;
-                }}
-                .graph-title {{
+                }
+                .graph-title {
                     font-size: 1.5rem;
                     color: #333;
                     font-weight: 600;
-                }}
-                .graph-container {{
+                }
+                .graph-container {
                     background: white;
                     border-radius: 12px;
                     padding: 25px;
@@ -635,8 +778,8 @@ def create_detailed_pollutant_view(city, pollutant):
                     position: relative;
                     height: 300px;
                     overflow-x: auto;
-                }}
-                .graph-bars {{
+                }
+                .graph-bars {
                     display: flex;
                     gap: 2px;
                     align-items: end;
@@ -645,8 +788,8 @@ def create_detailed_pollutant_view(city, pollutant):
                     margin: 0 auto;
                     position: relative;
                     padding: 0 10px;
-                }}
-                .graph-bar {{
+                }
+                .graph-bar {
                     background: linear-gradient(to top, #0066cc, #0099ff);
                     border-radius: 3px 3px 0 0;
                     min-width: 8px;
@@ -654,13 +797,13 @@ def create_detailed_pollutant_view(city, pollutant):
                     transition: all 0.3s ease;
                     position: relative;
                     box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                .graph-bar:hover {{
+                }
+                .graph-bar:hover {
                     transform: translateY(-2px);
                     opacity: 1;
                     box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                }}
-                .graph-y-labels {{
+                }
+                .graph-y-labels {
                     position: absolute;
                     left: 10px;
                     top: 0;
@@ -671,22 +814,22 @@ def create_detailed_pollutant_view(city, pollutant):
                     font-size: 0.8rem;
                     color: #666;
                     font-weight: 500;
-                }}
-                .graph-labels {{
+                }
+                .graph-labels {
                     display: flex;
                     justify-content: space-between;
                     margin-top: 10px;
                     font-size: 0.8rem;
                     color: #666;
                     font-weight: 500;
-                }}
-                .graph-stats {{
+                }
+                .graph-stats {
                     display: flex;
                     justify-content: space-around;
                     margin-top: 20px;
                     gap: 20px;
-                }}
-                .stat-box {{
+                }
+                .stat-box {
                     background: white;
                     border: 2px solid #4CAF50;
                     border-radius: 10px;
@@ -694,65 +837,65 @@ def create_detailed_pollutant_view(city, pollutant):
                     text-align: center;
                     flex: 1;
                     box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-                }}
-                .stat-value {{
+                }
+                .stat-value {
                     font-size: 1.5rem;
                     font-weight: 700;
                     color: #4CAF50;
                     margin-bottom: 5px;
-                }}
-                .stat-label {{
+                }
+                .stat-label {
                     font-size: 0.9rem;
                     color: #666;
                     font-weight: 500;
-                }}
-                .sources-section {{
+                }
+                .sources-section {
                     margin-top: 40px;
-                }}
-                .sources-title {{
+                }
+                .sources-title {
                     font-size: 1.5rem;
                     color: #333;
                     text-align: center;
                     margin-bottom: 30px;
                     font-weight: 600;
-                }}
-                .sources-grid {{
+                }
+                .sources-grid {
                     display: grid;
                     grid-template-columns: repeat(auto-fit, minmax(250px, 1fr));
                     gap: 20px;
                     margin-top: 20px;
-                }}
-                .source-card {{ 
+                }
+                .source-card { 
                     background: #f8f9fa; 
                     border-radius: 12px;
                     padding: 25px; 
-                    border-left: 4px solid {color};
+                    border-left: 4px solid $color;
                     box-shadow: 0 3px 10px rgba(0,0,0,0.08);
                     transition: transform 0.3s ease, box-shadow 0.3s ease;
                     text-align: center;
-                }}
-                .source-card:hover {{
+                }
+                .source-card:hover {
                     transform: translateY(-5px);
                     box-shadow: 0 8px 25px rgba(0,0,0,0.15);
-                }}
-                .source-icon {{
+                }
+                .source-icon {
                     font-size: 2.5rem;
                     margin-bottom: 15px;
                     display: block;
-                }}
-                .source-card h3 {{
+                }
+                .source-card h3 {
                     color: #333;
                     font-size: 1.2rem;
                     margin-bottom: 10px;
                     font-weight: 600;
-                }}
-                .source-card p {{
+                }
+                .source-card p {
                     color: #666;
                     font-size: 0.9rem;
                     line-height: 1.5;
-                }}
-                .close-btn {{ 
-                    background: linear-gradient(135deg, {color} 0%, {color}dd 100%); 
+                }
+                .close-btn { 
+                    background: linear-gradient(135deg, $color 0%, ${color}dd 100%); 
                     color: white; 
                     border: none; 
                     padding: 12px 30px; 
@@ -761,31 +904,31 @@ def create_detailed_pollutant_view(city, pollutant):
                     font-weight: 600;
                     cursor: pointer;
                     transition: all 0.3s ease;
-                    box-shadow: 0 2px 8px {color}40;
-                }}
-                .close-btn:hover {{
+                    box-shadow: 0 2px 8px ${color}40;
+                }
+                .close-btn:hover {
                     transform: translateY(-2px);
-                    box-shadow: 0 5px 15px {color}60;
-                }}
+                    box-shadow: 0 5px 15px ${color}60;
+                }
             </style>
         </head>
         <body>
             <div class="container">
                 <div class="header">
-                    <h1>{info['name']} Level</h1>
-                    <p>{city}, United Kingdom</p>
+                    <h1>$name Level</h1>
+                    <p>$city, United Kingdom</p>
                 </div>
                 
                 <div class="main-content">
                     <!-- Current Level Section -->
                     <div class="current-level-section">
-                        <h2 class="current-level-title">What is the Current {pollutant} Level?</h2>
-                        <p class="current-level-subtitle">{city}</p>
+                        <h2 class="current-level-title">What is the Current $pollutant Level?</h2>
+                        <p class="current-level-subtitle">$city</p>
                         
                         <div class="main-display">
-                            <span class="pollutant-icon">{data['icon']}</span>
-                            <div class="pollutant-value">{data['value']}<span class="pollutant-unit">{data['unit']}</span></div>
-                            <div class="status-badge">{data['status']}</div>
+                            <span class="pollutant-icon">$icon</span>
+                            <div class="pollutant-value">$value<span class="pollutant-unit">$unit</span></div>
+                            <div class="status-badge">$status</div>
                             <p class="last-updated">Last Updated: Recent</p>
                         </div>
                         
@@ -813,44 +956,44 @@ def create_detailed_pollutant_view(city, pollutant):
                     <!-- Graph Section -->
                     <div class="graph-section">
                         <div class="graph-title-section">
-                            <h3 class="graph-title">{pollutant} Historical Data (All-Time)</h3>
+                            <h3 class="graph-title">$pollutant Historical Data (All-Time)</h3>
                         </div>
-                        {graph_html}
+                        $graph_html
                     </div>
                     
                     <!-- Sources Section -->
                     <div class="sources-section">
-                        <h3 class="sources-title">Where Does {pollutant} Come From?</h3>
+                        <h3 class="sources-title">Where Does $pollutant Come From?</h3>
                         <div class="sources-grid">
                             <div class="source-card">
                                 <span class="source-icon">🚗</span>
                                 <h3>Vehicle Emissions</h3>
-                                <p>Diesel and gasoline vehicles release {pollutant} through exhaust fumes and brake wear.</p>
+                                <p>Diesel and gasoline vehicles release $pollutant through exhaust fumes and brake wear.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🏭</span>
                                 <h3>Industrial Processes</h3>
-                                <p>Factories and power plants emit {pollutant} during manufacturing and energy production.</p>
+                                <p>Factories and power plants emit $pollutant during manufacturing and energy production.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🔥</span>
                                 <h3>Combustion Activities</h3>
-                                <p>Burning of fuels, waste, and biomass releases {pollutant} into the atmosphere.</p>
+                                <p>Burning of fuels, waste, and biomass releases $pollutant into the atmosphere.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🌫️</span>
                                 <h3>Natural Sources</h3>
-                                <p>Dust storms, wildfires, and volcanic eruptions contribute to {pollutant} levels.</p>
+                                <p>Dust storms, wildfires, and volcanic eruptions contribute to $pollutant levels.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🏗️</span>
                                 <h3>Construction</h3>
-                                <p>Building activities, demolition, and road construction generate {pollutant} dust.</p>
+                                <p>Building activities, demolition, and road construction generate $pollutant dust.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🌾</span>
                                 <h3>Agriculture</h3>
-                                <p>Farming activities, crop burning, and livestock operations produce {pollutant}.</p>
+                                <p>Farming activities, crop burning, and livestock operations produce $pollutant.</p>
                             </div>
                         </div>
                     </div>
@@ -862,53 +1005,101 @@ def create_detailed_pollutant_view(city, pollutant):
             </div>
         </body>
     </html>
-    """
+    """)
+
+def create_detailed_pollutant_view(city, pollutant):
+    """Create detailed pollutant view with real historical data from database"""
+    # Keyed on the data version like create_map, so refreshed readings rebuild the view
+    return _detailed_pollutant_view(city, pollutant, latest_version)
+
+@pn.cache(max_items=64, ttl=CACHE_TTL)
+def _detailed_pollutant_view(city, pollutant, data_version):
+    """Build the detailed pollutant view HTML for a city from the data at data_version"""
+    if city not in latest_sites:
+        return "City data not available"
+    
+    pollutant_col = POLLUTANT_COLUMNS[pollutant]
+    
+    # Get latest data for current values: a one-row read off the (site, datetime DESC) index,
+    # fetching only the pollutant this view shows
+    latest_row = load_historical_data_sample(city, 1, ('datetime', pollutant_col), data_version).iloc[0]
+    
+    # Get pollutant info
+    info = get_pollutant_info(pollutant)
+    
+    # Get current pollutant value and status
+    pollutant_value = latest_row[pollutant_col]
+    status, color, bg_color = get_pollutant_status(pollutant, pollutant_value)
+    
+    # Prepare data for the view
+    data = {
+        'value': pollutant_value,
+        'unit': info['unit'],
+        'status': status,
+        'color': color,
+        'icon': info['icon']
+    }
+    
+    # Get daily averages for the graph (all-time data), aggregated in SQLite
+    daily_data = load_daily_means(city, pollutant_col, data_version)
+    
+    # Sample at most 200 evenly spaced days to show realistic trends
+    idx = np.linspace(0, len(daily_data) - 1, min(200, len(daily_data)), dtype=np.int64)
+    sampled_data = daily_data.take(idx)
+    
+    # Prepare graph data as column arrays
+    dates = pd.DatetimeIndex(sampled_data['date'])
+    values = sampled_data['value'].to_numpy()
+    
+    # Generate graph HTML with real data
+    graph_html = generate_real_historical_graph(dates, values, pollutant, data)
+    
+    # Create the detailed view HTML
+    html_content = DETAIL_VIEW_TEMPLATE.substitute(
+        color=color,
+        city=city,
+        pollutant=pollutant,
+        name=info['name'],
+        icon=data['icon'],
+        value=data['value'],
+        unit=data['unit'],
+        status=data['status'],
+        graph_html=graph_html
+    )
     
     return html_content
 
-def generate_real_historical_graph(graph_data, pollutant, data):
-    """Generate real historical graph HTML from database data"""
-    if not graph_data:
+def generate_real_historical_graph(dates, values, pollutant, data):
+    """Generate real historical graph HTML from database data (parallel date/value arrays)"""
+    if len(values) == 0:
         return "<p>No historical data available</p>"
     
-    # Calculate graph dimensions
-    values = [d['value'] for d in graph_data]
-    max_val = max(values)
-    min_val = min(values)
+    # Calculate graph dimensions with NumPy reductions (days with no readings are NaN and skipped)
+    values = np.asarray(values, dtype=np.float64)
+    max_val = float(np.nanmax(values))
+    min_val = float(np.nanmin(values))
     value_range = max_val - min_val if max_val != min_val else max_val
     
+    # Bar heights (0-100%) and display dates for every point in one vectorized pass
+    if value_range > 0:
+        heights = (values - min_val) / value_range * 100
+    else:
+        heights = np.full(len(values), 50.0)  # Default height if all values are the same
+    date_strs = pd.DatetimeIndex(dates).strftime('%b %d')
+    
     # Generate bars HTML
-    bars_html = ""
-    for i, point in enumerate(graph_data):
-        # Calculate bar height (0-100%)
-        if value_range > 0:
-            height_percent = ((point['value'] - min_val) / value_range) * 100
-        else:
-            height_percent = 50  # Default height if all values are the same
-        
-        # Format date for display
-        date_str = point['date'].strftime('%b %d')
-        
-        bars_html += f"""
-        <div class="graph-bar" style="height: {height_percent}%;" 
-             title="{date_str}: {point['value']:.1f} {data['unit']}"></div>
-        """
+    unit = data['unit']
+    bars_html = "".join(
+        f'<div class="graph-bar" style="height: {height:.2f}%;" title="{date_str}: {value:.1f} {unit}"></div>'
+        for height, date_str, value in zip(heights, date_strs, values)
+    )
     
     # Generate labels
-    labels_html = ""
-    for point in graph_data:
-        date_str = point['date'].strftime('%b %d')
-        labels_html += f'<span>{date_str}</span>'
+    labels_html = "".join(f'<span>{date_str}</span>' for date_str in date_strs)
     
-    # Generate Y-axis labels
-    y_labels = []
-    for i in range(5):
-        value = min_val + (value_range * i / 4)
-        y_labels.append(f'{value:.1f}')
-    
-    y_labels_html = ""
-    for label in reversed(y_labels):
-        y_labels_html += f'<span>{label}</span>'
+    # Generate Y-axis labels, top to bottom
+    y_values = np.linspace(min_val, min_val + value_range, 5)
+    y_labels_html = "".join(f'<span>{value:.1f}</span>' for value in y_values[::-1])
     
     # Calculate stats
     current_value = data['value']
@@ -946,17 +1137,21 @@ def generate_real_historical_graph(graph_data, pollutant, data):
 # --- AQI CARD CREATION ---
 def create_aqi_card(city):
     """Create AQI status card"""
-    if city not in latest_data['site'].values:
+    if city not in latest_sites:
         return "City data not available"
     
-    city_data = latest_data[latest_data['site'] == city].iloc[0]
-    aqi = calc_aqi(city_data['pm25'])
-    status, emoji, color, bg_color = get_aqi_status(aqi)
-    
-    # Format last updated time
-    last_updated = city_data['datetime'].strftime("%d %b %H:%M")
-    
-    card_html = f"""
+    city_data = latest_by_site.loc[city]
+    # Key the rendered card on the reading at its displayed precision, so it is rebuilt only when
+    # something visible changes; the AQI is computed from the unrounded PM2.5
+    pm25 = float(city_data['pm25'])
+    return _render_aqi_card(
+        city, city_data['datetime'].strftime("%d %b %H:%M"), calc_aqi(pm25),
+        round(pm25, 1), round(float(city_data['pm10']), 1),
+        round(float(city_data['temperature']), 1), round(float(city_data['humidity']), 1)
+    )
+
+# AQI status card, compiled once at import; autoescape keeps odd site names from breaking the markup
+AQI_CARD_TEMPLATE = _JINJA_ENV.from_string("""
     <div style="
         background: linear-gradient(135deg, #ffffff 0%, #f8f9fa 50%, #e9ecef 100%);
         border-radius: 20px;
@@ -972,7 +1167,7 @@ def create_aqi_card(city):
         <!-- Header - Left aligned -->
         <div style="text-align: left; margin-bottom: 15px;">
             <h2 style="margin: 0 0 5px 0; color: #333; font-size: 1.2rem; font-weight: 600;">Real-time Air Quality Data</h2>
-            <p style="margin: 0; color: #666; font-size: 0.9rem;">{city}, United Kingdom • Last Updated: {last_updated}</p>
+            <p style="margin: 0; color: #666; font-size: 0.9rem;">{{ city }}, United Kingdom • Last Updated: {{ last_updated }}</p>
         </div>
         
         <div style="display: flex; justify-content: space-between; align-items: center;">
@@ -981,20 +1176,20 @@ def create_aqi_card(city):
                 <!-- AQI Section -->
                 <div style="text-align: left;">
                     <div style="font-size: 0.9rem; color: #666; margin-bottom: 3px;">Live AQI</div>
-                    <div style="font-size: 3.5rem; font-weight: bold; color: {color}; margin-bottom: 3px;">{aqi}</div>
+                    <div style="font-size: 3.5rem; font-weight: bold; color: {{ color }}; margin-bottom: 3px;">{{ aqi }}</div>
                     <div style="font-size: 1rem; font-weight: 600; color: #333; margin-bottom: 3px;">Air Quality is</div>
-                    <div style="font-size: 1.2rem; font-weight: bold; color: {color};">{status}</div>
+                    <div style="font-size: 1.2rem; font-weight: bold; color: {{ color }};">{{ status }}</div>
                 </div>
                 
                 <!-- PM Values -->
                 <div style="text-align: left; display: flex; gap: 30px;">
                     <div>
                         <div style="font-size: 0.9rem; color: #666; margin-bottom: 2px;">PM10</div>
-                        <div style="font-size: 1.1rem; font-weight: bold; color: #333;">{city_data['pm10']:.1f} µg/m³</div>
+                        <div style="font-size: 1.1rem; font-weight: bold; color: #333;">{{ "%.1f"|format(pm10) }} µg/m³</div>
                     </div>
                     <div>
                         <div style="font-size: 0.9rem; color: #666; margin-bottom: 2px;">PM2.5</div>
-                        <div style="font-size: 1.1rem; font-weight: bold; color: #333;">{city_data['pm25']:.1f} µg/m³</div>
+                        <div style="font-size: 1.1rem; font-weight: bold; color: #333;">{{ "%.1f"|format(pm25) }} µg/m³</div>
                     </div>
                 </div>
             </div>
@@ -1003,8 +1198,8 @@ def create_aqi_card(city):
             <div style="flex: 1; background: linear-gradient(135deg, #e3f2fd, #bbdefb); border-radius: 12px; padding: 15px; border: 1px solid #e0e0e0;">
                 <div style="text-align: center;">
                     <div style="font-size: 1.3rem; margin-bottom: 3px;">☁️</div>
-                    <div style="font-size: 1.3rem; font-weight: bold; color: #333; margin-bottom: 3px;">{city_data['temperature']:.1f}°C</div>
-                    <div style="font-size: 0.8rem; color: #666; margin-bottom: 2px;">Humidity: {city_data['humidity']:.1f}%</div>
+                    <div style="font-size: 1.3rem; font-weight: bold; color: #333; margin-bottom: 3px;">{{ "%.1f"|format(temperature) }}°C</div>
+                    <div style="font-size: 0.8rem; color: #666; margin-bottom: 2px;">Humidity: {{ "%.1f"|format(humidity) }}%</div>
                     <div style="font-size: 0.8rem; color: #666;">Wind: 14 km/h</div>
                 </div>
             </div>
@@ -1030,20 +1225,27 @@ def create_aqi_card(city):
             </div>
         </div>
     </div>
-    """
+    """)
+
+@pn.cache(max_items=128)
+def _render_aqi_card(city, last_updated, aqi, pm25, pm10, temperature, humidity):
+    """Render the AQI status card HTML from one site's latest reading"""
+    status, emoji, color, bg_color = get_aqi_status(aqi)
     
-    return card_html
+    return AQI_CARD_TEMPLATE.render(
+        city=city, last_updated=last_updated, aqi=aqi, status=status, color=color,
+        pm25=pm25, pm10=pm10, temperature=temperature, humidity=humidity
+    )
 
 # --- TREND CHARTS ---
+# History shared by the trend chart and the historical AQI graph; identical arguments mean
+# both read the same load_history_arrays cache entry for a city
+AQI_HISTORY_LIMIT = 1000
+# Width of each bar on the historical AQI graph; readings sharing a bucket are averaged
+AQI_GRAPH_BUCKET_MINUTES = 60
+
 def create_trend_chart(city, time_range):
     """Create AQI trend chart"""
-    # Load historical data for the specific city (memory optimized)
-    df = load_historical_data_sample(site=city, limit=1000)
-    city_data = df[df['site'] == city].copy()
-    
-    if city_data.empty:
-        return go.Figure()
-    
     if time_range == 'Last 24 Hours':
         cutoff = datetime.now() - timedelta(hours=24)
     elif time_range == 'Last 7 Days':
@@ -1051,20 +1253,24 @@ def create_trend_chart(city, time_range):
     else:  # Last 30 Days
         cutoff = datetime.now() - timedelta(days=30)
     
-    city_data = city_data[city_data['datetime'] >= cutoff].sort_values('datetime')
+    # Reuse the cached history the AQI graph loads for the same city (sorted by time),
+    # and take the window as a slice from the first reading at or after the cutoff
+    datetimes, pm25 = load_history_arrays(city, AQI_HISTORY_LIMIT, latest_version)
+    start = np.searchsorted(datetimes, np.datetime64(cutoff))
+    datetimes, pm25 = datetimes[start:], pm25[start:]
     
-    if city_data.empty:
+    if len(datetimes) == 0:
         return go.Figure()
     
     # Calculate AQI for each data point
-    city_data['aqi'] = city_data['pm25'].apply(calc_aqi)
+    aqi = calc_aqi_batch(pm25)
     
     fig = go.Figure()
     
     # Add AQI line
     fig.add_trace(go.Scatter(
-        x=city_data['datetime'],
-        y=city_data['aqi'],
+        x=datetimes,
+        y=aqi,
         mode='lines+markers',
         name='AQI',
         line=dict(color='#667eea', width=3),
@@ -1073,8 +1279,8 @@ def create_trend_chart(city, time_range):
     
     # Add PM2.5 line
     fig.add_trace(go.Scatter(
-        x=city_data['datetime'],
-        y=city_data['pm25'],
+        x=datetimes,
+        y=pm25,
         mode='lines+markers',
         name='PM2.5 (µg/m³)',
         line=dict(color='#ff6b6b', width=2),
@@ -1097,10 +1303,10 @@ def create_trend_chart(city, time_range):
 
 def create_pollutants_chart(city):
     """Create pollutants comparison chart"""
-    if city not in latest_data['site'].values:
+    if city not in latest_sites:
         return go.Figure()
     
-    city_data = latest_data[latest_data['site'] == city].iloc[0]
+    city_data = latest_by_site.loc[city]
     
     pollutants = ['PM2.5', 'PM10', 'NO₂', 'O₃']
     values = [city_data['pm25'], city_data['pm10'], city_data['no2'], city_data['o3']]
@@ -1162,82 +1368,80 @@ controls = pn.Row(align='center')
 # Map section
 map_pane = pn.pane.Plotly(create_map(cities[0] if cities else None), height=450)
 
+def _warm_city_maps():
+    """Build every city's map at the current data version, once per process"""
+    if pn.state.cache.get('city_maps_version') == latest_version:
+        return
+    pn.state.cache['city_maps_version'] = latest_version
+    for city in cities:
+        create_map(city)
+
+# Warm after the page has loaded, so any later city selection is a cache hit without delaying the first render
+pn.state.onload(_warm_city_maps)
+
 # AQI Card (will be updated dynamically) - centered like AQI.in
 aqi_card = pn.pane.HTML(create_aqi_card(cities[0] if cities else None))
 
 # Create pollutant cards function
+# Layout shared by the historical graph's "no data" placeholders, built once at import
+_EMPTY_FIG_TEMPLATE = go.Figure()
+_EMPTY_FIG_TEMPLATE.update_layout(
+    plot_bgcolor='white',
+    paper_bgcolor='white',
+    height=200,
+    showlegend=False,
+    xaxis=dict(visible=False),
+    yaxis=dict(visible=False)
+)
+
+def _empty_fig(message):
+    """Create a placeholder figure showing only a centered gray message"""
+    fig = go.Figure(_EMPTY_FIG_TEMPLATE)
+    fig.add_annotation(
+        text=message,
+        xref="paper", yref="paper",
+        x=0.5, y=0.5, showarrow=False,
+        font=dict(size=14, color="gray")
+    )
+    return fig
+
 def create_historical_aqi_graph(city):
     """Create historical AQI graph for a city - synchronized with original data"""
     if not city:
         return None
+    # Keyed on the data version rather than a TTL: a city's serialized figure is reused until the
+    # database changes, however long ago it was built. Using the session's latest_version (not the live
+    # file mtime) keeps the graph on the same snapshot as the map and cards until the next refresh
+    return _historical_aqi_graph(city, latest_version)
+
+@pn.cache(max_items=64)
+def _historical_aqi_graph(city, data_version):
+    """Build the historical AQI figure dict for a city from the history at data_version"""
+    # Get historical data for the city as time-sorted arrays (sampled for memory efficiency)
+    datetimes, pm25 = load_history_arrays(city, AQI_HISTORY_LIMIT, data_version)
     
-    # Get historical data for the city (sampled for memory efficiency)
-    df = load_historical_data_sample(site=city, limit=1000)
-    city_data = df[df['site'] == city].copy()
-    
-    if city_data.empty:
+    if len(datetimes) == 0:
         # If no data for this city, create a placeholder graph
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"No historical data available for {city}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=14, color="gray")
-        )
-        fig.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            height=200,
-            showlegend=False,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False)
-        )
-        return fig
-    
-    # Convert datetime to datetime
-    city_data['datetime'] = pd.to_datetime(city_data['datetime'])
+        return _empty_fig(f"No historical data available for {city}").to_dict()
     
-    # Sort by datetime
-    city_data = city_data.sort_values('datetime')
-    
-    # Get the last 24 hours of data for better synchronization
-    latest_time = city_data['datetime'].max()
-    cutoff_time = latest_time - timedelta(hours=24)
-    recent_data = city_data[city_data['datetime'] >= cutoff_time].copy()
+    # Get the last 24 hours of data for better synchronization (the newest reading is last)
+    start = np.searchsorted(datetimes, datetimes[-1] - np.timedelta64(24, 'h'))
     
     # If we don't have 24 hours of data, get the last 20 data points
-    if len(recent_data) < 5:
-        recent_data = city_data.tail(20).copy()
-    
-    if recent_data.empty:
-        # Still no data, create placeholder
-        fig = go.Figure()
-        fig.add_annotation(
-            text=f"No data available for {city}",
-            xref="paper", yref="paper",
-            x=0.5, y=0.5, showarrow=False,
-            font=dict(size=14, color="gray")
-        )
-        fig.update_layout(
-            plot_bgcolor='white',
-            paper_bgcolor='white',
-            height=200,
-            showlegend=False,
-            xaxis=dict(visible=False),
-            yaxis=dict(visible=False)
-        )
-        return fig
+    if len(datetimes) - start < 5:
+        start = max(len(datetimes) - 20, 0)
+    datetimes, pm25 = datetimes[start:], pm25[start:]
     
-    # Calculate AQI for each row
-    recent_data['aqi'] = recent_data['pm25'].apply(calc_aqi)
+    # Calculate AQI for each reading, one bar per AQI_GRAPH_BUCKET_MINUTES
+    datetimes, aqi = _aggregate_aqi(datetimes, calc_aqi_batch(pm25), AQI_GRAPH_BUCKET_MINUTES)
     
     # Create the graph
     fig = go.Figure()
     
     # Add bar chart with dark green styling
     fig.add_trace(go.Bar(
-        x=recent_data['datetime'],
-        y=recent_data['aqi'],
+        x=datetimes,
+        y=aqi,
         marker_color='#2e7d32',
         name='AQI',
         hovertemplate='<b>Time:</b> %{x}<br><b>AQI:</b> %{y}<extra></extra>',
@@ -1268,18 +1472,18 @@ def create_historical_aqi_graph(city):
         yaxis=dict(
             showgrid=True,
             gridcolor='#f0f0f0',
-            range=[0, max(recent_data['aqi']) * 1.1 if max(recent_data['aqi']) > 0 else 50],
+            range=[0, max(aqi) * 1.1 if max(aqi) > 0 else 50],
             tickfont=dict(size=9),
             tickmode='linear',
             dtick=20
         )
     )
     
-    return fig
+    # Plain dict, as with create_map: each Plotly pane builds its own figure from the shared cache entry
+    return fig.to_dict()
 
-def create_aqi_index():
-    """Create AQI index scale component"""
-    return f"""
+# AQI index scale; fully static markup, so it is a plain module constant
+AQI_INDEX_HTML = """
     <div style="
         margin: 30px auto;
         max-width: 1200px;
@@ -1472,443 +1676,132 @@ def create_aqi_index():
     </div>
     """
 
+def create_aqi_index():
+    """Create AQI index scale component"""
+    return AQI_INDEX_HTML
+
 def create_pollutant_cards(city):
     """Create pollutant cards like AQI.in - improved layout with click functionality"""
-    if city not in latest_data['site'].values:
+    if city not in latest_sites:
         return "City data not available"
     
-    city_data = latest_data[latest_data['site'] == city].iloc[0]
-    
-    # Get pollutant values and status
-    pm25_value = city_data['pm25']
-    pm10_value = city_data['pm10']
-    no2_value = city_data['no2']
-    o3_value = city_data['o3']
-    co_value = city_data.get('co', 95)
-    so2_value = city_data.get('so2', 0)
+    city_data = latest_by_site.loc[city]
     
-    # Get status and colors for each pollutant
-    pm25_status, pm25_color, _ = get_pollutant_status('PM2.5', pm25_value)
-    pm10_status, pm10_color, _ = get_pollutant_status('PM10', pm10_value)
-    no2_status, no2_color, _ = get_pollutant_status('NO2', no2_value)
-    o3_status, o3_color, _ = get_pollutant_status('O3', o3_value)
-    
-    # Create JavaScript for pollutant detail view with real data
-    js_code = f"""
+    # Get pollutant values rounded to their displayed precision; the rendered cards are cached
+    # on these, so readings that look the same on screen share one entry
+    return _render_pollutant_cards(
+        city, round(float(city_data['pm25']), 1), round(float(city_data['pm10']), 1),
+        round(float(city_data['no2']), 0), round(float(city_data['o3']), 0),
+        round(float(city_data.get('co', 95)), 0), round(float(city_data.get('so2', 0)), 0)
+    )
+
+# Static part of the pollutant-card script (pollutant descriptions and the detail window builder),
+# kept out of the per-city f-string so none of it is re-formatted on each render
+POLLUTANT_DETAIL_SCRIPT = _strip_indent("""
     <script>
-    // Store pollutant data
-    const pollutantData = {{
-        'PM2.5': {{ value: {pm25_value:.1f}, status: '{pm25_status}', color: '{pm25_color}', unit: 'µg/m³', icon: '🌫️' }},
-        'PM10': {{ value: {pm10_value:.1f}, status: '{pm10_status}', color: '{pm10_color}', unit: 'µg/m³', icon: '🌫️' }},
-        'NO2': {{ value: {no2_value:.0f}, status: '{no2_status}', color: '{no2_color}', unit: 'ppb', icon: '🚗' }},
-        'O3': {{ value: {o3_value:.0f}, status: '{o3_status}', color: '{o3_color}', unit: 'ppb', icon: '☀️' }},
-        'CO': {{ value: {co_value:.0f}, status: 'Good', color: '#00e400', unit: 'ppb', icon: '🔥' }},
-        'SO2': {{ value: {so2_value:.0f}, status: 'Good', color: '#00e400', unit: 'ppb', icon: '🏭' }}
-    }};
-    
-    const pollutantInfo = {{
-        'PM2.5': {{
+    var pollutantInfo = {
+        'PM2.5': {
             name: 'Particulate Matter (PM2.5)',
             description: 'Fine particles with diameter less than 2.5 micrometers that can penetrate deep into the lungs.',
             sources: 'Vehicle emissions, industrial processes, wildfires, and combustion activities.',
             health_effects: 'Can cause respiratory and cardiovascular issues, especially in sensitive individuals.'
-        }},
-        'PM10': {{
+        },
+        'PM10': {
             name: 'Particulate Matter (PM10)',
             description: 'Coarse particles with diameter less than 10 micrometers that can be inhaled.',
             sources: 'Dust, construction activities, agriculture, vehicle emissions, and industrial processes.',
             health_effects: 'Can irritate eyes, nose, and throat, and cause respiratory problems.'
-        }},
-        'NO2': {{
+        },
+        'NO2': {
             name: 'Nitrogen Dioxide (NO₂)',
             description: 'A reddish-brown gas with a sharp, biting odor that forms from combustion processes.',
             sources: 'Vehicle emissions, power plants, industrial facilities, and heating systems.',
             health_effects: 'Can cause respiratory problems, reduce lung function, and aggravate asthma.'
-        }},
-        'O3': {{
+        },
+        'O3': {
             name: 'Ozone (O₃)',
             description: 'A gas formed when pollutants react in sunlight, creating ground-level ozone.',
             sources: 'Vehicle emissions, industrial processes, and chemical reactions in sunlight.',
             health_effects: 'Can cause breathing problems, aggravate asthma, and reduce lung function.'
-        }},
-        'CO': {{
+        },
+        'CO': {
             name: 'Carbon Monoxide (CO)',
             description: 'A colorless, odorless gas produced by incomplete combustion of carbon-based fuels.',
             sources: 'Vehicle emissions, industrial processes, wildfires, and heating systems.',
             health_effects: 'Reduces oxygen delivery to body tissues and can cause headaches and dizziness.'
-        }},
-        'SO2': {{
+        },
+        'SO2': {
             name: 'Sulfur Dioxide (SO₂)',
             description: 'A colorless gas with a pungent odor that forms from burning sulfur-containing fuels.',
             sources: 'Power plants, industrial facilities, volcanoes, and some heating systems.',
             health_effects: 'Can cause respiratory problems, acid rain, and damage to vegetation.'
-        }}
-    }};
+        }
+    };
     
-    function showPollutantDetail(pollutant, city) {{
-        const data = pollutantData[pollutant];
+    // Top-level bindings use var: the script runs again whenever the cards re-render, and
+    // redeclaring a const there would abort it
+    var detailCache = new Map();
+    var DETAIL_URL_TTL_MS = 60000;
+    
+    function showPollutantDetail(pollutant, city) {
+        const data = window.__P[pollutant];
         const info = pollutantInfo[pollutant];
         
-        if (!data || !info) {{
+        if (!data || !info) {
             alert('Data not available for ' + pollutant);
             return;
-        }}
+        }
         
-        const detailHtml = createPollutantDetailHTML(pollutant, city, data, info);
-        const newWindow = window.open('', '_blank', 'width=1200,height=800,scrollbars=yes');
-        newWindow.document.write(detailHtml);
-        newWindow.document.close();
-    }}
-    
-    function createPollutantDetailHTML(pollutant, city, data, info) {{
-        return `
-        <html>
+        // Pages are only built when a card is clicked, then memoized for repeat opens of the same reading
+        const key = pollutant + '|' + city + '|' + data.value + '|' + data.status;
+        let detailHtml = detailCache.get(key);
+        if (detailHtml === undefined) {
+            detailHtml = createPollutantDetailHTML(pollutant, city, data, info);
+            detailCache.set(key, detailHtml);
+        }
+        // Navigate the new window to the page as a blob URL, so it goes through the browser's normal
+        // streaming parser instead of the document.write slow path. A load listener on the returned window
+        // can bind to its initial about:blank document and never fire, so the URL is freed on a timer
+        // that leaves the navigation ample time to read it
+        const url = URL.createObjectURL(new Blob([detailHtml], { type: 'text/html;charset=utf-8' }));
+        window.open(url, '_blank', 'width=1200,height=800,scrollbars=yes');
+        setTimeout(() => URL.revokeObjectURL(url), DETAIL_URL_TTL_MS);
+    }
+    
+    // The detail window's stylesheet is served from the assets static dir, so the browser caches it
+    // across opens instead of receiving the full style block with every page
+    var DETAIL_CSS_URL = window.location.origin + '/assets/pollutant_detail.css';
+    
+    // Split the detail page template into its static chunks and placeholder keys once, at load;
+    // each window open then only concatenates the handful of dynamic values between them
+    function splitTemplate(parts, ...keys) {
+        return { parts: parts, keys: keys };
+    }
+    
+    var DETAIL_TEMPLATE = splitTemplate`
+        <html style="--p-color: ${'color'}; --p-tint: ${'color'}15; --p-glow: ${'color'}08; --p-shadow: ${'color'}40; --p-shadow-strong: ${'color'}60; --p-fade: ${'color'}dd;">
         <head>
-            <title>${{info.name}} - ${{city}} Air Quality</title>
-            <style>
-                * {{ margin: 0; padding: 0; box-sizing: border-box; }}
-                body {{ 
-                    font-family: -apple-system, BlinkMacSystemFont, 'Segoe UI', Roboto, Oxygen, Ubuntu, Cantarell, sans-serif; 
-                    background: #f8f9fa; 
-                    color: #333;
-                    line-height: 1.6;
-                }}
-                .container {{ 
-        max-width: 1200px;
-                    margin: 0 auto; 
-                    background: white; 
-                    min-height: 100vh;
-                    box-shadow: 0 0 20px rgba(0,0,0,0.1);
-                }}
-                .header {{ 
-                    background: linear-gradient(135deg, #667eea 0%, #764ba2 100%);
-                    color: white;
-                    padding: 30px 40px;
-                    text-align: center;
-                }}
-                .header h1 {{ 
-                    font-size: 2.5rem; 
-                    font-weight: 700; 
-                    margin-bottom: 10px;
-                    text-shadow: 0 2px 4px rgba(0,0,0,0.3);
-                }}
-                .header p {{ 
-                    font-size: 1.2rem; 
-                    opacity: 0.9;
-                    font-weight: 300;
-                }}
-                .main-content {{
-                    padding: 40px;
-                }}
-                .current-level-section {{
-                    margin-bottom: 40px;
-                }}
-                .current-level-title {{
-                    font-size: 1.8rem;
-                    font-weight: 700;
-                    color: #333;
-                    margin-bottom: 20px;
-                    text-align: center;
-                }}
-                .current-level-subtitle {{
-                    font-size: 1.2rem;
-                    color: #0066cc;
-                    font-weight: 600;
-                    text-align: center;
-                    margin-bottom: 30px;
-                }}
-                .main-display {{ 
-                    background: linear-gradient(135deg, ${{data.color}}15 0%, #ffffff 100%); 
-                    border: 2px solid ${{data.color}};
-        border-radius: 15px;
-                    padding: 30px 25px; 
-                    margin-bottom: 30px; 
-                text-align: center;
-                    position: relative;
-                    overflow: hidden;
-                    max-width: 400px;
-                    margin-left: auto;
-                    margin-right: auto;
-                }}
-                .main-display::before {{
-                    content: '';
-                    position: absolute;
-                    top: -50%;
-                    right: -50%;
-                    width: 200%;
-                    height: 200%;
-                    background: radial-gradient(circle, ${{data.color}}08 0%, transparent 70%);
-                    z-index: 0;
-                }}
-                .main-display > * {{ position: relative; z-index: 1; }}
-                .pollutant-icon {{ 
-                    font-size: 3rem; 
-                    margin-bottom: 15px;
-                    display: block;
-                }}
-                .pollutant-value {{ 
-                    font-size: 3.5rem; 
-                    font-weight: 800; 
-                    color: ${{data.color}}; 
-                    margin-bottom: 10px;
-                    text-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                .pollutant-unit {{ 
-                    font-size: 1.5rem; 
-                    font-weight: 600; 
-                    color: #666;
-                    margin-left: 8px;
-                }}
-                .status-badge {{ 
-                    background: ${{data.color}}; 
-                color: white;
-                    padding: 8px 20px; 
-                    border-radius: 25px; 
-                    font-size: 1rem; 
-                    font-weight: 700; 
-                    display: inline-block; 
-                    margin-bottom: 15px;
-                    box-shadow: 0 2px 8px ${{data.color}}40;
-                    text-transform: uppercase;
-                    letter-spacing: 0.5px;
-                }}
-                .last-updated {{ 
-                    color: #666; 
-                    font-size: 0.9rem;
-                    font-weight: 500;
-                }}
-                .graph-section {{
-                    background: white;
-                    border-radius: 15px;
-                    padding: 30px;
-                    margin-bottom: 40px;
-                    box-shadow: 0 4px 15px rgba(0,0,0,0.08);
-                }}
-                .graph-title {{
-                    font-size: 1.4rem;
-                    font-weight: 700;
-                    color: #333;
-                    margin-bottom: 20px;
-                    text-align: center;
-                }}
-                .graph-container {{
-                    background: white;
-                border-radius: 12px;
-                padding: 25px;
-                    margin: 20px 0;
-                    box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                    position: relative;
-                    height: 300px;
-                    overflow-x: auto;
-                }}
-                .graph-bars {{
-                    display: flex;
-                    gap: 2px;
-                    align-items: end;
-                    height: 200px;
-                    max-width: 100%;
-                    margin: 0 auto;
-                    position: relative;
-                    padding: 0 10px;
-                }}
-                .graph-bar {{
-                    background: linear-gradient(to top, #0066cc, #0099ff);
-                    border-radius: 3px 3px 0 0;
-                    min-width: 8px;
-                    opacity: 0.9;
-                    transition: all 0.3s ease;
-                    position: relative;
-                    box-shadow: 0 2px 4px rgba(0,0,0,0.1);
-                }}
-                .graph-bar:hover {{
-                    opacity: 1;
-                    transform: scaleY(1.05);
-                    box-shadow: 0 4px 8px rgba(0,0,0,0.2);
-                }}
-                .graph-axis {{
-                    position: absolute;
-                    left: 0;
-                    right: 0;
-                    height: 200px;
-                    pointer-events: none;
-                }}
-                .graph-axis-line {{
-                    position: absolute;
-                    left: 0;
-                    right: 0;
-                    height: 1px;
-                    background: #ddd;
-                }}
-                .graph-axis-line:nth-child(1) {{ top: 0; }}
-                .graph-axis-line:nth-child(2) {{ top: 50px; }}
-                .graph-axis-line:nth-child(3) {{ top: 100px; }}
-                .graph-axis-line:nth-child(4) {{ top: 150px; }}
-                .graph-axis-line:nth-child(5) {{ top: 200px; }}
-                .graph-labels {{
-                    display: flex;
-                    justify-content: space-between;
-                    margin-top: 15px;
-                    font-size: 0.8rem;
-                    color: #666;
-                    font-weight: 500;
-                }}
-                .graph-y-labels {{
-                    position: absolute;
-                    left: -40px;
-                    top: 0;
-                    height: 200px;
-                    display: flex;
-                    flex-direction: column;
-                    justify-content: space-between;
-                    font-size: 0.75rem;
-                    color: #666;
-                    font-weight: 500;
-                }}
-                .graph-title-section {{
-                text-align: center;
-                    margin-bottom: 20px;
-                }}
-                .graph-stats {{
-                    display: flex;
-                    justify-content: center;
-                    gap: 30px;
-                    margin-top: 20px;
-                }}
-                .stat-box {{
-                    background: white;
-                    border: 2px solid ${{data.color}};
-                    border-radius: 8px;
-                    padding: 10px 15px;
-                    text-align: center;
-                    min-width: 100px;
-                }}
-                .stat-value {{
-                    font-size: 1.2rem;
-                    font-weight: 700;
-                    color: ${{data.color}};
-                }}
-                .stat-label {{
-                    font-size: 0.8rem;
-                    color: #666;
-                    margin-top: 2px;
-                }}
-                .sources-section {{
-                    margin-bottom: 40px;
-                }}
-                .sources-title {{
-                    font-size: 1.6rem;
-                    font-weight: 700;
-                    color: #333;
-                    margin-bottom: 30px;
-                    text-align: center;
-                }}
-                .sources-grid {{ 
-                    display: grid; 
-                    grid-template-columns: repeat(3, 1fr); 
-                    gap: 20px; 
-                    margin-bottom: 40px; 
-                }}
-                .source-card {{ 
-                    background: #f8f9fa; 
-                border-radius: 12px;
-                padding: 25px;
-                    border-left: 4px solid ${{data.color}};
-                    box-shadow: 0 3px 10px rgba(0,0,0,0.08);
-                    transition: transform 0.3s ease, box-shadow 0.3s ease;
-                text-align: center;
-                }}
-                .source-card:hover {{
-                    transform: translateY(-3px);
-                    box-shadow: 0 6px 20px rgba(0,0,0,0.12);
-                }}
-                .source-icon {{ 
-                    font-size: 2.5rem; 
-                    margin-bottom: 15px;
-                    display: block;
-                }}
-                .source-card h3 {{ 
-                    font-size: 1.1rem; 
-                    font-weight: 700; 
-                    margin-bottom: 10px;
-                    color: #333;
-                }}
-                .source-card p {{ 
-                    color: #555; 
-                    font-size: 0.9rem; 
-                    line-height: 1.5;
-                    font-weight: 400;
-                }}
-                .close-section {{ 
-                    text-align: center; 
-                    padding: 20px 0;
-                    border-top: 1px solid #e0e0e0;
-                }}
-                .close-btn {{ 
-                    background: linear-gradient(135deg, ${{data.color}} 0%, ${{data.color}}dd 100%); 
-                color: white;
-                    border: none; 
-                    padding: 12px 30px; 
-                    border-radius: 25px; 
-                    font-size: 1rem; 
-                    font-weight: 600; 
-                    cursor: pointer;
-                    transition: all 0.3s ease;
-                    box-shadow: 0 3px 10px ${{data.color}}40;
-                }}
-                .close-btn:hover {{
-                    transform: translateY(-2px);
-                    box-shadow: 0 5px 15px ${{data.color}}60;
-                }}
-                .aqi-scale {{
-                    background: white;
-                    border-radius: 10px;
-                    padding: 20px;
-                    margin: 20px 0;
-                    box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-                }}
-                .scale-bar {{
-                    display: flex;
-                    height: 6px;
-                    border-radius: 3px;
-                    overflow: hidden;
-                    margin-bottom: 8px;
-                }}
-                .scale-segment {{
-                    flex: 1;
-                    height: 100%;
-                }}
-                .scale-labels {{
-                    display: flex;
-                    justify-content: space-between;
-                    font-size: 0.75rem;
-                    color: #666;
-                    font-weight: 500;
-                }}
-                .good {{ background: #00e400; }}
-                .moderate {{ background: #ff8c00; }}
-                .poor {{ background: #ff7e00; }}
-                .unhealthy {{ background: #ff0000; }}
-                .severe {{ background: #8f3f97; }}
-                .hazardous {{ background: #7e0023; }}
-            </style>
+            <meta charset="UTF-8">
+            <title>${'name'} - ${'city'} Air Quality</title>
+            <link rel="stylesheet" href="${'css'}">
         </head>
         <body>
             <div class="container">
                 <div class="header">
-                    <h1>${{info.name}} Level</h1>
-                    <p>${{city}}, United Kingdom</p>
+                    <h1>${'name'} Level</h1>
+                    <p>${'city'}, United Kingdom</p>
             </div>
             
                 <div class="main-content">
                     <!-- Current Level Section -->
                     <div class="current-level-section">
-                        <h2 class="current-level-title">What is the Current ${{pollutant}} Level?</h2>
-                        <p class="current-level-subtitle">${{city}}</p>
+                        <h2 class="current-level-title">What is the Current ${'pollutant'} Level?</h2>
+                        <p class="current-level-subtitle">${'city'}</p>
                         
                         <div class="main-display">
-                            <span class="pollutant-icon">${{data.icon}}</span>
-                            <div class="pollutant-value">${{data.value}}<span class="pollutant-unit">${{data.unit}}</span></div>
-                            <div class="status-badge">${{data.status}}</div>
+                            <span class="pollutant-icon">${'icon'}</span>
+                            <div class="pollutant-value">${'value'}<span class="pollutant-unit">${'unit'}</span></div>
+                            <div class="status-badge">${'status'}</div>
                             <p class="last-updated">Last Updated: Recent</p>
             </div>
             
@@ -1935,37 +1828,37 @@ def create_pollutant_cards(city):
             
                     <!-- Sources Section -->
                     <div class="sources-section">
-                        <h3 class="sources-title">Where Does ${{pollutant}} Come From?</h3>
+                        <h3 class="sources-title">Where Does ${'pollutant'} Come From?</h3>
                         <div class="sources-grid">
                             <div class="source-card">
                                 <span class="source-icon">🚗</span>
                                 <h3>Vehicle Emissions</h3>
-                                <p>Diesel and gasoline vehicles release ${{pollutant}} through exhaust fumes and brake wear.</p>
+                                <p>Diesel and gasoline vehicles release ${'pollutant'} through exhaust fumes and brake wear.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🏭</span>
                                 <h3>Industrial Processes</h3>
-                                <p>Factories and power plants emit ${{pollutant}} during manufacturing and energy production.</p>
+                                <p>Factories and power plants emit ${'pollutant'} during manufacturing and energy production.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🔥</span>
                                 <h3>Combustion Activities</h3>
-                                <p>Burning of fuels, waste, and biomass releases ${{pollutant}} into the atmosphere.</p>
+                                <p>Burning of fuels, waste, and biomass releases ${'pollutant'} into the atmosphere.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🌫️</span>
                                 <h3>Natural Sources</h3>
-                                <p>Dust storms, wildfires, and volcanic eruptions contribute to ${{pollutant}} levels.</p>
+                                <p>Dust storms, wildfires, and volcanic eruptions contribute to ${'pollutant'} levels.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🏗️</span>
                                 <h3>Construction</h3>
-                                <p>Building activities, demolition, and road construction generate ${{pollutant}} dust.</p>
+                                <p>Building activities, demolition, and road construction generate ${'pollutant'} dust.</p>
                             </div>
                             <div class="source-card">
                                 <span class="source-icon">🌾</span>
                                 <h3>Agriculture</h3>
-                                <p>Farming activities, crop burning, and livestock operations produce ${{pollutant}}.</p>
+                                <p>Farming activities, crop burning, and livestock operations produce ${'pollutant'}.</p>
                             </div>
                         </div>
                     </div>
@@ -1978,12 +1871,55 @@ def create_pollutant_cards(city):
         </body>
         </html>
         `;
-    }}
-    </script>
-    """
     
-    cards_html = f"""
-    {js_code}
+    function createPollutantDetailHTML(pollutant, city, data, info) {
+        const fields = {
+            name: info.name, city: city, pollutant: pollutant, color: data.color, css: DETAIL_CSS_URL,
+            icon: data.icon, value: data.value, unit: data.unit, status: data.status
+        };
+        const parts = DETAIL_TEMPLATE.parts;
+        const keys = DETAIL_TEMPLATE.keys;
+        const chunks = [parts[0]];
+        for (let i = 0; i < keys.length; i++) {
+            chunks.push(fields[keys[i]], parts[i + 1]);
+        }
+        return chunks.join('');
+    }
+    </script>
+""")
+
+# Pollutant cards in display order: code, name, unit, value format and arrow glyph
+POLLUTANT_CARD_ROWS = (
+    ('PM2.5', 'Particulate Matter', 'µg/m³', '.1f', '→'),
+    ('PM10', 'Particulate Matter', 'µg/m³', '.1f', '→'),
+    ('CO', 'Carbon Monoxide', 'ppb', '.0f', '→'),
+    ('SO2', 'Sulfur Dioxide', 'ppb', '.0f', '↓'),
+    ('NO2', 'Nitrogen Dioxide', 'ppb', '.0f', '→'),
+    ('O3', 'Ozone', 'ppb', '.0f', '→'),
+)
+# Section wrapper around the pollutant cards; only the city is filled in. The card styles live in a
+# class so hover is a CSS transition rather than inline mouse handlers on every card
+POLLUTANT_CARDS_HEADER = _strip_indent("""    <style>
+        .pollutant-card {{
+            background: #f8f9fa;
+            border: 1px solid #e0e0e0;
+            border-radius: 12px;
+            padding: 25px 20px;
+            box-shadow: 0 4px 12px rgba(0,0,0,0.08);
+            cursor: pointer;
+            transition: transform 0.3s ease, box-shadow 0.3s ease;
+            will-change: transform;
+            min-height: 120px;
+            display: flex;
+            flex-direction: row;
+            justify-content: space-between;
+            align-items: center;
+        }}
+        .pollutant-card:hover {{
+            transform: translateY(-3px);
+            box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+        }}
+    </style>
     <div style="
         background: white;
         padding: 40px 60px;
@@ -1998,166 +1934,96 @@ def create_pollutant_cards(city):
         </div>
         
         <div style="display: grid; grid-template-columns: repeat(3, 1fr); gap: 25px; max-width: 1200px; margin: 0 auto;">
-            <!-- PM2.5 Card -->
-            <div onclick="showPollutantDetail('PM2.5', '{city}')" style="
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-left: 5px solid {pm25_color};
-                border-radius: 12px;
-                padding: 25px 20px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                 cursor: pointer;
-                 transition: all 0.3s ease;
-                min-height: 120px;
-                display: flex;
-                flex-direction: row;
-                justify-content: space-between;
-                align-items: center;
-            " onmouseover="this.style.transform='translateY(-3px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 4px 12px rgba(0,0,0,0.08)'">
-                <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">Particulate Matter</div>
-                    <div style="font-size: 0.9rem; color: #666;">(PM2.5)</div>
-                 </div>
-                <div style="display: flex; align-items: center; gap: 10px;">
-                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{pm25_value:.1f} µg/m³</div>
-                    <div style="font-size: 1.2rem; color: {pm25_color};">→</div>
-                </div>
-            </div>
-            
-            <!-- PM10 Card -->
-            <div onclick="showPollutantDetail('PM10', '{city}')" style="
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-left: 5px solid {pm10_color};
-                border-radius: 12px;
-                padding: 25px 20px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                 cursor: pointer;
-                 transition: all 0.3s ease;
-                min-height: 120px;
-                display: flex;
-                flex-direction: row;
-                justify-content: space-between;
-                align-items: center;
-            " onmouseover="this.style.transform='translateY(-3px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 4px 12px rgba(0,0,0,0.08)'">
+""")
+POLLUTANT_CARDS_FOOTER = _strip_indent("""        </div>
+    </div>
+""")
+# Markup for one pollutant card, filled in for each row of POLLUTANT_CARD_ROWS
+POLLUTANT_CARD_TEMPLATE = _strip_indent("""            <!-- {code} Card -->
+            <div class="pollutant-card" onclick="showPollutantDetail('{code}', '{city}')" style="border-left: 5px solid {border_color};">
                 <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">Particulate Matter</div>
-                    <div style="font-size: 0.9rem; color: #666;">(PM10)</div>
+                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">{name}</div>
+                    <div style="font-size: 0.9rem; color: #666;">({code})</div>
                  </div>
                 <div style="display: flex; align-items: center; gap: 10px;">
-                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{pm10_value:.1f} µg/m³</div>
-                    <div style="font-size: 1.2rem; color: {pm10_color};">→</div>
-                </div>
-            </div>
-            
-            <!-- CO Card -->
-            <div onclick="showPollutantDetail('CO', '{city}')" style="
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-left: 5px solid #00e400;
-                border-radius: 12px;
-                padding: 25px 20px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                cursor: pointer;
-                transition: all 0.3s ease;
-                min-height: 120px;
-                display: flex;
-                flex-direction: row;
-                justify-content: space-between;
-                align-items: center;
-            " onmouseover="this.style.transform='translateY(-3px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 4px 12px rgba(0,0,0,0.08)'">
-                <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">Carbon Monoxide</div>
-                    <div style="font-size: 0.9rem; color: #666;">(CO)</div>
-                </div>
-                <div style="display: flex; align-items: center; gap: 10px;">
-                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{co_value:.0f} ppb</div>
-                    <div style="font-size: 1.2rem; color: #666;">→</div>
-                </div>
-            </div>
-            
-            <!-- SO2 Card -->
-            <div onclick="showPollutantDetail('SO2', '{city}')" style="
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-left: 5px solid #00e400;
-                border-radius: 12px;
-                padding: 25px 20px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                cursor: pointer;
-                transition: all 0.3s ease;
-                min-height: 120px;
-                display: flex;
-                flex-direction: row;
-                justify-content: space-between;
-                align-items: center;
-            " onmouseover="this.style.transform='translateY(-3px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 4px 12px rgba(0,0,0,0.08)'">
-                <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">Sulfur Dioxide</div>
-                    <div style="font-size: 0.9rem; color: #666;">(SO2)</div>
-                </div>
-                <div style="display: flex; align-items: center; gap: 10px;">
-                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{so2_value:.0f} ppb</div>
-                    <div style="font-size: 1.2rem; color: #666;">↓</div>
-                </div>
-            </div>
-            
-            <!-- NO2 Card -->
-            <div onclick="showPollutantDetail('NO2', '{city}')" style="
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-left: 5px solid {no2_color};
-                border-radius: 12px;
-                padding: 25px 20px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                cursor: pointer;
-                transition: all 0.3s ease;
-                min-height: 120px;
-                display: flex;
-                flex-direction: row;
-                justify-content: space-between;
-                align-items: center;
-            " onmouseover="this.style.transform='translateY(-3px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 4px 12px rgba(0,0,0,0.08)'">
-                <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">Nitrogen Dioxide</div>
-                    <div style="font-size: 0.9rem; color: #666;">(NO2)</div>
-                </div>
-                <div style="display: flex; align-items: center; gap: 10px;">
-                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{no2_value:.0f} ppb</div>
-                    <div style="font-size: 1.2rem; color: {no2_color};">→</div>
+                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{value:{fmt}} {unit}</div>
+                    <div style="font-size: 1.2rem; color: {arrow_color};">{arrow}</div>
                 </div>
             </div>
             
-            <!-- O3 Card -->
-            <div onclick="showPollutantDetail('O3', '{city}')" style="
-                background: #f8f9fa;
-                border: 1px solid #e0e0e0;
-                border-left: 5px solid {o3_color};
-                border-radius: 12px;
-                padding: 25px 20px;
-                box-shadow: 0 4px 12px rgba(0,0,0,0.08);
-                cursor: pointer;
-                transition: all 0.3s ease;
-                min-height: 120px;
-                display: flex;
-                flex-direction: row;
-                justify-content: space-between;
-                align-items: center;
-            " onmouseover="this.style.transform='translateY(-3px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 4px 12px rgba(0,0,0,0.08)'">
-                <div style="display: flex; flex-direction: column; gap: 5px;">
-                    <div style="font-size: 1.1rem; color: #333; font-weight: 500;">Ozone</div>
-                    <div style="font-size: 0.9rem; color: #666;">(O3)</div>
-                </div>
-                <div style="display: flex; align-items: center; gap: 10px;">
-                    <div style="font-size: 1.8rem; font-weight: bold; color: #333;">{o3_value:.0f} ppb</div>
-                    <div style="font-size: 1.2rem; color: {o3_color};">→</div>
-                </div>
-            </div>
-        </div>
-    </div>
-    """
+""")
+# Unit, icon and display precision of each reading handed to the detail script as window.__P
+POLLUTANT_DATA_META = {
+    'PM2.5': ('µg/m³', '🌫️', 1),
+    'PM10': ('µg/m³', '🌫️', 1),
+    'NO2': ('ppb', '🚗', 0),
+    'O3': ('ppb', '☀️', 0),
+    'CO': ('ppb', '🔥', 0),
+    'SO2': ('ppb', '🏭', 0),
+}
+# Bound fill-in methods, looked up once instead of on every render
+_CARDS_HEADER_FMT = POLLUTANT_CARDS_HEADER.format_map
+_CARD_FMT = POLLUTANT_CARD_TEMPLATE.format_map
+
+_CARD_ROWS_BY_CODE = {row[0]: row for row in POLLUTANT_CARD_ROWS}
+
+@lru_cache(maxsize=512)
+def _render_pollutant_card(code, city, value, border_color, arrow_color):
+    """Render one pollutant card; unchanged readings reuse the previous markup"""
+    _, name, unit, fmt, arrow = _CARD_ROWS_BY_CODE[code]
+    return _CARD_FMT({
+        'code': code, 'name': name, 'unit': unit, 'fmt': fmt, 'arrow': arrow, 'city': city,
+        'value': value, 'border_color': border_color, 'arrow_color': arrow_color,
+    })
+
+# Bump when the pollutant card markup or scripts change so persisted renders are not reused
+POLLUTANT_CARDS_VERSION = 8
+
+@pn.cache(
+    max_items=128,
+    to_disk=diskcache is not None,
+    cache_path=os.path.join('.cache_pollutant_html', f'v{POLLUTANT_CARDS_VERSION}'),
+)
+def _render_pollutant_cards(city, pm25_value, pm10_value, no2_value, o3_value, co_value, so2_value):
+    """Render the pollutant cards HTML and detail-view script from one site's latest reading"""
+    # Get status and colors for each pollutant in a single lookup
+    statuses, colors, _ = status_many(CARD_POLLUTANT_CODES, [pm25_value, pm10_value, no2_value, o3_value])
+    pm25_status, pm10_status, no2_status, o3_status = statuses
+    pm25_color, pm10_color, no2_color, o3_color = colors
+    
+    # Only the readings change per city; the rest of the detail script is the static POLLUTANT_DETAIL_SCRIPT.
+    # CO and SO2 aren't graded, so they are always reported as Good
+    readings = {
+        'PM2.5': (pm25_value, pm25_status, pm25_color),
+        'PM10': (pm10_value, pm10_status, pm10_color),
+        'NO2': (no2_value, no2_status, no2_color),
+        'O3': (o3_value, o3_status, o3_color),
+        'CO': (co_value, 'Good', '#00e400'),
+        'SO2': (so2_value, 'Good', '#00e400'),
+    }
+    data = {}
+    for code, (value, status, color) in readings.items():
+        unit, icon, digits = POLLUTANT_DATA_META[code]
+        data[code] = {'value': round(float(value), digits), 'status': status, 'color': color, 'unit': unit, 'icon': icon}
+    data_script = f"<script>window.__P = {json.dumps(data, ensure_ascii=False)};</script>"
+    
+    # CO and SO2 aren't graded, so they get a fixed green border and a neutral arrow
+    card_values = {
+        'PM2.5': (pm25_value, pm25_color, pm25_color),
+        'PM10': (pm10_value, pm10_color, pm10_color),
+        'CO': (co_value, '#00e400', '#666'),
+        'SO2': (so2_value, '#00e400', '#666'),
+        'NO2': (no2_value, no2_color, no2_color),
+        'O3': (o3_value, o3_color, o3_color),
+    }
     
-    return cards_html
+    # Collect the fragments and join once
+    parts = [data_script, POLLUTANT_DETAIL_SCRIPT, _CARDS_HEADER_FMT({'city': city})]
+    for code, *_ in POLLUTANT_CARD_ROWS:
+        parts.append(_render_pollutant_card(code, city, *card_values[code]))
+    parts.append(POLLUTANT_CARDS_FOOTER)
+    
+    return "".join(parts)
 
 # Create pollutant cards
 pollutant_cards = pn.pane.HTML(create_pollutant_cards(cities[0] if cities else None))
@@ -2171,8 +2037,9 @@ aqi_graph = pn.pane.Plotly(
 )
 
 # Create graph header
+@pn.cache(max_items=256)
 def create_graph_header(city):
-    return f"""
+    return _mini(f"""
     <div style="
         margin: 20px auto 0 auto;
         max-width: 1200px;
@@ -2234,7 +2101,7 @@ def create_graph_header(city):
             </div>
         </div>
     </div>
-    """
+    """)
 
 graph_header = pn.pane.HTML(create_graph_header(cities[0] if cities else None))
 
@@ -2256,68 +2123,40 @@ charts_row = pn.Column(
 # Create AQI index component
 aqi_index = pn.pane.HTML(create_aqi_index())
 
-def create_city_cards():
-    """Create city cards similar to aqi.in showing all UK cities"""
-    # Load data for all cities
-    df = load_latest_data()
-    
-    # Get unique sites (cities)
-    cities = df['site'].unique()
-    
-    # City icons (landmarks for each city)
-    city_icons = {
-        'London': '🏰',  # Tower Bridge
-        'Birmingham': '🏢',  # Rotunda
-        'Manchester': '🏙️',  # Beetham Tower
-        'Glasgow': '🎭',  # Clyde Auditorium
-        'Leeds': '🏛️',  # Town Hall
-        'Bristol': '🌉',  # Clifton Suspension Bridge
-        'Liverpool': '⚓',  # Albert Dock
-        'Newcastle': '🌉',  # Tyne Bridge
-        'Sheffield': '🏭',  # Industrial heritage
-        'Edinburgh': '🏰',  # Edinburgh Castle
-        'Cardiff': '🏴󠁧󠁢󠁷󠁬󠁳󠁿',  # Welsh flag
-        'Belfast': '🍀',  # Northern Ireland
-        'Nottingham': '🌳',  # Sherwood Forest
-        'Southampton': '🚢',  # Port city
-        'Oxford': '🎓',  # University
-        'Cambridge': '🎓',  # University
-        'Brighton': '🏖️',  # Seaside
-        'Plymouth': '⚓',  # Naval port
-        'York': '🏰',  # York Minster
-        'Norwich': '🏛️',  # Cathedral
-        'Bath': '🛁',  # Roman baths
-        'Exeter': '🏛️',  # Cathedral
-        'Coventry': '🏛️',  # Cathedral
-        'Derby': '🏭',  # Industrial
-        'Stoke': '🏺',  # Pottery
-        'Wolverhampton': '🐺',  # Wolves
-        'Reading': '📚',  # University
-        'Preston': '🏛️',  # Guild Hall
-        'Newport': '🏴󠁧󠁢󠁷󠁬󠁳󠁿',  # Welsh
-        'Swansea': '🏴󠁧󠁢󠁷󠁬󠁳󠁿',  # Welsh
-        'Bradford': '🏭',  # Industrial
-        'Sunderland': '⚽',  # Football
-        'Hull': '🐟',  # Fishing port
-        'Leicester': '🦊',  # Foxes
-        'Portsmouth': '⚓',  # Naval base
-        'Bolton': '🏭',  # Industrial
-        'Stockport': '🌉',  # Viaduct
-        'Wigan': '🏭',  # Industrial
-        'Middlesbrough': '🏭',  # Industrial
-        'Blackpool': '🎡',  # Pleasure Beach
-        'Warrington': '🌉',  # Bridge
-        'Milton Keynes': '🛣️',  # Grid system
-        'Northampton': '👢',  # Boots
-        'Luton': '✈️',  # Airport
-        'Swindon': '🚗',  # Car industry
-        'Dundee': '🍊',  # Jute
-        'Aberdeen': '🛢️',  # Oil
-        'Inverness': '🏔️',  # Highlands
-        'Perth': '🏛️',  # Fair City
-    }
-    
-    cards_html = """
+# Static wrappers around the city cards grid and the ranking table, built once at import.
+# Card and row styles live in shared classes; per-row values (badge and rank colors, bar width) are
+# passed as CSS custom properties, and hover is a CSS transition rather than inline mouse handlers
+CITY_CARDS_HEADER = _mini("""
+    <style>
+        .city-card {
+            background: #ffffff;
+            border: 2px solid #666666;
+            border-radius: 12px;
+            padding: 20px;
+            transition: transform 0.3s ease, box-shadow 0.3s ease;
+            will-change: transform;
+            cursor: pointer;
+            position: relative;
+            box-shadow: 0 2px 4px rgba(0,0,0,0.08);
+            contain: layout paint style;
+            content-visibility: auto;
+            contain-intrinsic-size: auto 280px auto 200px;
+        }
+        .city-card:hover {
+            transform: translateY(-5px);
+            box-shadow: 0 8px 25px rgba(0,0,0,0.15);
+        }
+        .city-card-arrow { position: absolute; top: 10px; right: 10px; font-size: 1.2rem; color: #666; }
+        .city-card-head { display: flex; align-items: center; margin-bottom: 15px; }
+        .city-card-icon { font-size: 2rem; margin-right: 12px; }
+        .city-card-name { margin: 0; font-size: 1.3rem; font-weight: 600; color: #333; }
+        .city-card-place { margin: 0; font-size: 0.9rem; color: #666; }
+        .city-card-aqi { display: flex; justify-content: space-between; align-items: center; margin-bottom: 15px; }
+        .aqi-badge { background: var(--badge); color: white; padding: 8px 16px; border-radius: 20px; font-weight: 600; font-size: 1.1rem; }
+        .city-card-status { color: #333333; font-weight: 500; font-size: 0.9rem; }
+        .city-card-weather { display: flex; justify-content: space-between; font-size: 0.9rem; color: #666; }
+        .city-card-weather span { font-weight: 500; }
+    </style>
     <div style="
         background: white;
         border-radius: 15px;
@@ -2340,148 +2179,25 @@ def create_city_cards():
             gap: 20px;
             margin-top: 20px;
         ">
-    """
-    
-    for city in cities:
-        city_data = df[df['site'] == city].iloc[0]
-        
-        # Calculate AQI
-        aqi = calc_aqi(city_data['pm25'])
-        aqi_status = get_aqi_status(aqi)
-        
-        # Get city icon
-        icon = city_icons.get(city, '🏙️')
-        
-        # Format temperature and humidity with 1 decimal place
-        temp = round(city_data.get('temperature', 20), 1)
-        humidity = round(city_data.get('humidity', 65), 1)
-        
-        # Use gray/black colors for borders and text, but keep AQI badge colors
-        border_color = "#666666"  # Gray border
-        badge_color = aqi_status[2]  # AQI-based color for badge
-        text_color = "#333333"    # Dark gray text
-        
-        cards_html += f"""
-        <div style="
-            background: linear-gradient(135deg, #f8f9fa 0%, #ffffff 100%);
-            border: 2px solid {border_color};
-            border-radius: 12px;
-            padding: 20px;
-            transition: all 0.3s ease;
-            cursor: pointer;
-            position: relative;
-            box-shadow: 0 2px 8px rgba(0,0,0,0.08);
-        " onmouseover="this.style.transform='translateY(-5px)'; this.style.boxShadow='0 8px 25px rgba(0,0,0,0.15)'" 
-           onmouseout="this.style.transform='translateY(0)'; this.style.boxShadow='0 2px 8px rgba(0,0,0,0.08)'">
-            
-            <div style="
-                position: absolute;
-                top: 10px;
-                right: 10px;
-                font-size: 1.2rem;
-                color: #666;
-            ">→</div>
-            
-            <div style="
-                display: flex;
-                align-items: center;
-                margin-bottom: 15px;
-            ">
-                <span style="
-                    font-size: 2rem;
-                    margin-right: 12px;
-                ">{icon}</span>
-                <div>
-                    <h3 style="
-                        margin: 0;
-                        font-size: 1.3rem;
-                        font-weight: 600;
-                        color: #333;
-                    ">{city}</h3>
-                    <p style="
-                        margin: 0;
-                        font-size: 0.9rem;
-                        color: #666;
-                    ">📍 {city}, UK</p>
-                </div>
-            </div>
-            
-            <div style="
-                display: flex;
-                justify-content: space-between;
-                align-items: center;
-                margin-bottom: 15px;
-            ">
-                <div style="
-                    background: {badge_color};
-                    color: white;
-                    padding: 8px 16px;
-                    border-radius: 20px;
-                    font-weight: 600;
-                    font-size: 1.1rem;
-                ">
-                    AQI {aqi}
-                </div>
-                <div style="
-                    color: {text_color};
-                    font-weight: 500;
-                    font-size: 0.9rem;
-                ">
-                    {aqi_status[0]}
-                </div>
-            </div>
-            
-            <div style="
-                display: flex;
-                justify-content: space-between;
-                font-size: 0.9rem;
-                color: #666;
-            ">
-                <div>
-                    <span style="font-weight: 500;">🌡️ Temp:</span> {temp}°C
-                </div>
-                <div>
-                    <span style="font-weight: 500;">💧 Hum:</span> {humidity}%
-                </div>
-            </div>
-        </div>
-        """
-    
-    cards_html += """
+    """)
+CITY_CARDS_FOOTER = _mini("""
         </div>
     </div>
-    """
-    
-    return cards_html
-
-def create_polluted_cities_ranking():
-    """Create most polluted cities ranking table similar to aqi.in"""
-    # Load data for all cities
-    df = load_latest_data()
-    
-    # Calculate AQI for each city and sort by AQI (highest first)
-    city_rankings = []
-    for _, row in df.iterrows():
-        aqi = calc_aqi(row['pm25'])
-        aqi_status = get_aqi_status(aqi)
-        
-        # Calculate how many times above standard (assuming standard is 50)
-        standard_multiplier = max(1, int(aqi / 50))
-        
-        city_rankings.append({
-            'city': row['site'],
-            'aqi': aqi,
-            'status': aqi_status[0],
-            'color': aqi_status[2],
-            'bg_color': aqi_status[3],
-            'standard_multiplier': standard_multiplier
-        })
-    
-    # Sort by AQI (highest first) and take top 10
-    city_rankings.sort(key=lambda x: x['aqi'], reverse=True)
-    top_10 = city_rankings[:10]
-    
-    ranking_html = """
+    """)
+RANKING_HEADER = _mini("""
+    <style>
+        .rank-row { background: white; border-bottom: 1px solid #e0e0e0; }
+        .rank-cell { padding: 15px; }
+        .rank-num { font-weight: 600; color: #333; }
+        .rank-city { font-weight: 500; color: #333; }
+        .rank-aqi { text-align: center; }
+        .rank-aqi-wrap { display: flex; align-items: center; justify-content: center; gap: 8px; }
+        .rank-aqi-value { font-weight: 600; color: var(--rank-color); }
+        .rank-bar { width: 40px; height: 6px; background: #e0e0e0; border-radius: 3px; overflow: hidden; }
+        .rank-bar-fill { width: var(--bar); height: 100%; background: var(--rank-color); border-radius: 3px; }
+        .rank-status { text-align: center; color: var(--rank-color); font-weight: 500; }
+        .rank-standard { text-align: center; color: #666; font-size: 0.9rem; }
+    </style>
     <div style="
         background: white;
         border-radius: 15px;
@@ -2510,6 +2226,7 @@ def create_polluted_cities_ranking():
             border-radius: 12px;
             overflow: hidden;
             box-shadow: 0 2px 8px rgba(0,0,0,0.08);
+            contain: content;
         ">
             <table style="
                 width: 100%;
@@ -2530,79 +2247,8 @@ def create_polluted_cities_ranking():
                     </tr>
                 </thead>
                 <tbody>
-    """
-    
-    for i, city_data in enumerate(top_10, 1):
-        # Create a simple bar for AQI visualization
-        bar_width = min(100, (city_data['aqi'] / 100) * 100)
-        
-        # Use darker colors for better visibility
-        if city_data['color'] == '#ffff00':  # Yellow
-            display_color = '#FF8C00'  # Dark orange for better visibility
-        else:
-            display_color = city_data['color']
-        
-        ranking_html += f"""
-                    <tr style="
-                        background: white;
-                        border-bottom: 1px solid #e0e0e0;
-                    ">
-                        <td style="
-                            padding: 15px;
-                            font-weight: 600;
-                            color: #333;
-                        ">{i}</td>
-                        <td style="
-                            padding: 15px;
-                            font-weight: 500;
-                            color: #333;
-                        ">{city_data['city']}, United Kingdom</td>
-                        <td style="
-                            padding: 15px;
-                            text-align: center;
-                        ">
-                            <div style="
-                                display: flex;
-                                align-items: center;
-                                justify-content: center;
-                                gap: 8px;
-                            ">
-                                <span style="
-                                    font-weight: 600;
-                                    color: {display_color};
-                                ">{city_data['aqi']}</span>
-                                <div style="
-                                    width: 40px;
-                                    height: 6px;
-                                    background: #e0e0e0;
-                                    border-radius: 3px;
-                                    overflow: hidden;
-                                ">
-                                    <div style="
-                                        width: {bar_width}%;
-                                        height: 100%;
-                                        background: {display_color};
-                                        border-radius: 3px;
-                                    "></div>
-                                </div>
-                            </div>
-                        </td>
-                        <td style="
-                            padding: 15px;
-                            text-align: center;
-                            color: {display_color};
-                            font-weight: 500;
-                        ">{city_data['status']}</td>
-                        <td style="
-                            padding: 15px;
-                            text-align: center;
-                            color: #666;
-                            font-size: 0.9rem;
-                        ">{city_data['standard_multiplier']}x above Standard</td>
-                    </tr>
-        """
-    
-    ranking_html += """
+    """)
+RANKING_FOOTER = _mini("""
                 </tbody>
             </table>
         </div>
@@ -2622,15 +2268,204 @@ def create_polluted_cities_ranking():
             ">Last Updated: 07 Aug 2025, 05:26 PM</span>
         </div>
     </div>
-    """
+    """)
+
+# Markup for one city card and one ranking row, filled in per city through the bound format_map methods
+CITY_CARD_TEMPLATE = _mini("""
+        <div class="city-card">
+            <div class="city-card-arrow">→</div>
+            <div class="city-card-head">
+                <span class="city-card-icon">{icon}</span>
+                <div>
+                    <h3 class="city-card-name">{city}</h3>
+                    <p class="city-card-place">📍 {city}, UK</p>
+                </div>
+            </div>
+            <div class="city-card-aqi">
+                <div class="aqi-badge" style="--badge: {badge_color};">AQI {aqi}</div>
+                <div class="city-card-status">{status}</div>
+            </div>
+            <div class="city-card-weather">
+                <div><span>🌡️ Temp:</span> {temp}°C</div>
+                <div><span>💧 Hum:</span> {humidity}%</div>
+            </div>
+        </div>
+        """)
+RANK_ROW_TEMPLATE = _mini("""
+                    <tr class="rank-row" style="--rank-color: {display_color}; --bar: {bar_width}%;">
+                        <td class="rank-cell rank-num">{rank}</td>
+                        <td class="rank-cell rank-city">{city}, United Kingdom</td>
+                        <td class="rank-cell rank-aqi">
+                            <div class="rank-aqi-wrap">
+                                <span class="rank-aqi-value">{aqi}</span>
+                                <div class="rank-bar"><div class="rank-bar-fill"></div></div>
+                            </div>
+                        </td>
+                        <td class="rank-cell rank-status">{status}</td>
+                        <td class="rank-cell rank-standard">{standard_multiplier}x above Standard</td>
+                    </tr>
+        """)
+_CITY_CARD_FMT = CITY_CARD_TEMPLATE.format_map
+_RANK_ROW_FMT = RANK_ROW_TEMPLATE.format_map
+
+# City icons (landmarks for each city)
+CITY_ICONS = {
+    'London': '🏰',  # Tower Bridge
+    'Birmingham': '🏢',  # Rotunda
+    'Manchester': '🏙️',  # Beetham Tower
+    'Glasgow': '🎭',  # Clyde Auditorium
+    'Leeds': '🏛️',  # Town Hall
+    'Bristol': '🌉',  # Clifton Suspension Bridge
+    'Liverpool': '⚓',  # Albert Dock
+    'Newcastle': '🌉',  # Tyne Bridge
+    'Sheffield': '🏭',  # Industrial heritage
+    'Edinburgh': '🏰',  # Edinburgh Castle
+    'Cardiff': '🏴󠁧󠁢󠁷󠁬󠁳󠁿',  # Welsh flag
+    'Belfast': '🍀',  # Northern Ireland
+    'Nottingham': '🌳',  # Sherwood Forest
+    'Southampton': '🚢',  # Port city
+    'Oxford': '🎓',  # University
+    'Cambridge': '🎓',  # University
+    'Brighton': '🏖️',  # Seaside
+    'Plymouth': '⚓',  # Naval port
+    'York': '🏰',  # York Minster
+    'Norwich': '🏛️',  # Cathedral
+    'Bath': '🛁',  # Roman baths
+    'Exeter': '🏛️',  # Cathedral
+    'Coventry': '🏛️',  # Cathedral
+    'Derby': '🏭',  # Industrial
+    'Stoke': '🏺',  # Pottery
+    'Wolverhampton': '🐺',  # Wolves
+    'Reading': '📚',  # University
+    'Preston': '🏛️',  # Guild Hall
+    'Newport': '🏴󠁧󠁢󠁷󠁬󠁳󠁿',  # Welsh
+    'Swansea': '🏴󠁧󠁢󠁷󠁬󠁳󠁿',  # Welsh
+    'Bradford': '🏭',  # Industrial
+    'Sunderland': '⚽',  # Football
+    'Hull': '🐟',  # Fishing port
+    'Leicester': '🦊',  # Foxes
+    'Portsmouth': '⚓',  # Naval base
+    'Bolton': '🏭',  # Industrial
+    'Stockport': '🌉',  # Viaduct
+    'Wigan': '🏭',  # Industrial
+    'Middlesbrough': '🏭',  # Industrial
+    'Blackpool': '🎡',  # Pleasure Beach
+    'Warrington': '🌉',  # Bridge
+    'Milton Keynes': '🛣️',  # Grid system
+    'Northampton': '👢',  # Boots
+    'Luton': '✈️',  # Airport
+    'Swindon': '🚗',  # Car industry
+    'Dundee': '🍊',  # Jute
+    'Aberdeen': '🛢️',  # Oil
+    'Inverness': '🏔️',  # Highlands
+    'Perth': '🏛️',  # Fair City
+}
+
+def create_city_cards(df=None):
+    """Create city cards similar to aqi.in showing all UK cities"""
+    # Callers holding the latest frame can pass it in; otherwise load data for all cities
+    if df is None:
+        df = load_latest_data()
+    
+    # One row per site (the first, as in the frame's order), keyed on exactly what the card shows:
+    # the AQI and the temperature and humidity to one decimal place (defaults when the table lacks them)
+    rows = tuple(
+        (city_data.site, calc_aqi(city_data.pm25),
+         round(float(getattr(city_data, 'temperature', 20)), 1), round(float(getattr(city_data, 'humidity', 65)), 1))
+        for city_data in df.drop_duplicates('site').itertuples(index=False)
+    )
+    return _render_city_cards(rows)
+
+@pn.cache(max_items=8, ttl=CACHE_TTL)
+def _render_city_cards(rows):
+    """Render the city cards HTML from (city, aqi, temperature, humidity) rows"""
+    card_parts = [CITY_CARDS_HEADER]
+    
+    for city, aqi, temp, humidity in rows:
+        aqi_status = get_aqi_status(aqi)
+        
+        # Get city icon
+        icon = CITY_ICONS.get(city, '🏙️')
+        
+        # Borders and text are gray/black (set by the city-card classes); only the AQI badge is colored
+        badge_color = aqi_status[2]
+        
+        card_parts.append(_CITY_CARD_FMT({
+            'city': city, 'icon': icon, 'badge_color': badge_color, 'aqi': aqi,
+            'status': aqi_status[0], 'temp': temp, 'humidity': humidity,
+        }))
+    
+    card_parts.append(CITY_CARDS_FOOTER)
+    
+    return "".join(card_parts)
+
+def create_polluted_cities_ranking(df=None):
+    """Create most polluted cities ranking table similar to aqi.in"""
+    # Callers holding the latest frame can pass it in; otherwise load data for all cities
+    if df is None:
+        df = load_latest_data()
+    
+    # Calculate AQI for every city in one pass; the table shows nothing else, so it is cached on
+    # the (city, AQI) pairs alone
+    aqi = calc_aqi_vec(df['pm25'].to_numpy())
+    return _render_polluted_cities_ranking(tuple(df['site']), tuple(aqi.tolist()))
+
+@pn.cache(max_items=8, ttl=CACHE_TTL)
+def _render_polluted_cities_ranking(sites, aqi):
+    """Render the ranking table HTML from parallel city and AQI tuples"""
+    aqi = np.array(aqi, dtype=np.int64)
+    
+    # Take the top 10 by AQI (highest first) with a partial sort; anything tied with the 10th
+    # highest stays a candidate, so ties keep their row order
+    top = np.arange(len(aqi))
+    if len(aqi) > 10:
+        kth = np.partition(aqi, len(aqi) - 10)[len(aqi) - 10]
+        top = np.flatnonzero(aqi >= kth)
+    top = top[np.lexsort((top, -aqi[top]))][:10]
+    top_aqi = aqi[top]
+    statuses, _, colors, _ = get_aqi_status_vec(top_aqi)
+    
+    # How many times above standard (assuming standard is 50)
+    standard_multipliers = np.maximum(1, top_aqi // 50)
+    
+    # Use darker colors for better visibility: dark orange instead of yellow
+    display_colors = np.where(colors == '#ffff00', '#FF8C00', colors)
+    
+    ranking_parts = [RANKING_HEADER]
+    
+    # Walk the top rows' precomputed columns in rank order
+    for i, (city, city_aqi, status, display_color, multiplier) in enumerate(zip(
+        np.array(sites, dtype=object)[top], top_aqi.tolist(), statuses, display_colors, standard_multipliers.tolist()
+    ), 1):
+        # Create a simple bar for AQI visualization
+        bar_width = min(100, (city_aqi / 100) * 100)
+        
+        ranking_parts.append(_RANK_ROW_FMT({
+            'rank': i, 'city': city, 'aqi': city_aqi, 'status': status,
+            'display_color': display_color, 'bar_width': bar_width, 'standard_multiplier': multiplier,
+        }))
     
-    return ranking_html
+    ranking_parts.append(RANKING_FOOTER)
+    
+    return "".join(ranking_parts)
+
+# Placeholder shown in the below-the-fold sections until the page has loaded
+DEFERRED_SECTION_PLACEHOLDER = '<div style="min-height: 400px;"></div>'
 
 # Create city cards component
-city_cards = pn.pane.HTML(create_city_cards())
+city_cards = pn.pane.HTML(DEFERRED_SECTION_PLACEHOLDER)
 
 # Create polluted cities ranking component
-polluted_ranking = pn.pane.HTML(create_polluted_cities_ranking())
+polluted_ranking = pn.pane.HTML(DEFERRED_SECTION_PLACEHOLDER)
+
+def load_deferred_sections():
+    """Fill in the city cards and ranking once the rest of the page is on screen"""
+    with pn.io.hold():
+        city_cards.object = create_city_cards(latest_data)
+        polluted_ranking.object = create_polluted_cities_ranking(latest_data)
+
+# Keep the two largest sections out of the initial page; outside a server this runs immediately
+pn.state.onload(load_deferred_sections)
 
 # Main dashboard layout - properly centered
 main_dashboard = pn.Column(
@@ -2657,63 +2492,93 @@ def get_url_params():
 
 def create_main_dashboard():
     """Create the main dashboard view"""
-    return pn.Column(
-        header,
-        map_pane,
-        pn.Column(aqi_card, align='center', width=800),
-        charts_row,
-        aqi_index,
-        city_cards,
-        polluted_ranking,
-        align='center',
-        sizing_mode='stretch_width'
-    )
+    # The layout is built once above; swap it back into the content area unless it is already showing
+    if not any(obj is main_dashboard for obj in dynamic_content):
+        dynamic_content[:] = [main_dashboard]
+    return dynamic_content
+
+# Pollutant detail layout, built once; showing another pollutant only replaces the pane's HTML
+detail_view = pn.pane.HTML("")
+detail_dashboard = pn.Column(
+    detail_view,
+    align='center',
+    sizing_mode='stretch_width'
+)
 
 def create_pollutant_detail_dashboard(pollutant, city):
     """Create the pollutant detail dashboard view"""
-    detail_view = pn.pane.HTML(create_detailed_pollutant_view(city, pollutant))
-    return pn.Column(
-        detail_view,
-        align='center',
-        sizing_mode='stretch_width'
-    )
+    detail_view.object = create_detailed_pollutant_view(city, pollutant)
+    # Swap the detail layout into the existing content area unless it is already showing
+    if not any(obj is detail_dashboard for obj in dynamic_content):
+        dynamic_content[:] = [detail_dashboard]
+    return dynamic_content
 
-# Always show main dashboard by default
+# Always show main dashboard by default: the content area starts out holding it
 # Pollutant detail views will be handled by JavaScript navigation
-dashboard = create_main_dashboard()
+dashboard = dynamic_content
 
 # --- INTERACTIVITY ---
-@pn.depends(city_selector.param.value, watch=True)
-def update_map(city):
-    """Update map when city changes"""
-    map_pane.object = create_map(city)
+# Rapid city changes are coalesced: a watcher only renders once the selection has settled this long
+CITY_DEBOUNCE_MS = 200
 
-@pn.depends(city_selector.param.value, watch=True)
-def update_aqi_card(city):
-    """Update AQI card when city changes"""
-    aqi_card.object = create_aqi_card(city)
+def debounce(func):
+    """Defer a session watcher until its value has been stable for CITY_DEBOUNCE_MS"""
+    pending = []
+    
+    @wraps(func)
+    def wrapper(value):
+        # Outside a served session there are no rapid UI events to coalesce
+        if pn.state.curdoc is None or pn.state.curdoc.session_context is None:
+            return func(value)
+        if pending:
+            pending.pop().stop()
+        pending.append(pn.state.add_periodic_callback(lambda: func(value), period=CITY_DEBOUNCE_MS, count=1))
+    return wrapper
 
 @pn.depends(city_selector.param.value, watch=True)
-def update_pollutant_cards(city):
-    """Update pollutant cards when city changes"""
-    pollutant_cards.object = create_pollutant_cards(city)
+@debounce
+def update_city_views(city):
+    """Update the map, AQI card, pollutant cards and AQI graph when the city changes"""
+    # Hold the document so all five panes reach the browser as one batched update
+    with pn.io.hold():
+        map_pane.object = create_map(city)
+        aqi_card.object = create_aqi_card(city)
+        pollutant_cards.object = create_pollutant_cards(city)
+        aqi_graph.object = create_historical_aqi_graph(city)
+        graph_header.object = create_graph_header(city)
 
-@pn.depends(city_selector.param.value, watch=True)
-def update_aqi_graph(city):
-    """Update AQI graph when city changes"""
-    aqi_graph.object = create_historical_aqi_graph(city)
+# --- LIVE UPDATES ---
+def refresh_latest_data():
+    """Reload the latest readings and push the refreshed panes to the browser"""
+    global latest_version, latest_data, latest_sites, latest_by_site
+    # Only push deltas: unchanged data leaves every pane (and the user's map zoom and pan) untouched
+    version = db_mtime()
+    if version == latest_version:
+        return
+    # Keyed on the database version: only the first session after new data actually queries SQLite
+    latest_version = version
+    latest_data = _load_latest_data(latest_version)
+    latest_sites = frozenset(latest_data['site'])
+    latest_by_site = latest_data.set_index('site', drop=False)
+    city = city_selector.value
+    with pn.io.hold():
+        map_pane.object = create_map(city)
+        aqi_card.object = create_aqi_card(city)
+        pollutant_cards.object = create_pollutant_cards(city)
+        aqi_graph.object = create_historical_aqi_graph(city)
+        city_cards.object = create_city_cards(latest_data)
+        polluted_ranking.object = create_polluted_cities_ranking(latest_data)
 
-@pn.depends(city_selector.param.value, watch=True)
-def update_graph_header(city):
-    """Update graph header when city changes"""
-    graph_header.object = create_graph_header(city)
+# Refresh on the data cadence once the page has loaded, instead of re-querying per interaction
+pn.state.onload(lambda: pn.state.add_periodic_callback(refresh_latest_data, period=CACHE_TTL * 1000))
 
 # --- RUN DASHBOARD ---
 # Make dashboard servable
 dashboard.servable()
 
 if __name__ == '__main__':
-    dashboard.show()
+    # Gzip HTTP responses and compress the websocket frames that carry pane updates
+    dashboard.show(static_dirs={'assets': ASSETS_DIR}, compress_response=True, websocket_compression_level=6)
 else:
     # For running in notebook or other environments
     dashboard 
\ No newline at end of file